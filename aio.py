@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import subprocess
+
+import requests
+from requests.adapters import HTTPAdapter
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# (connect, read) timeouts in seconds for every HTTP request
+HTTP_TIMEOUT = (5, 15)
+HTTP_POOL_SIZE = 8
+
+
+class AsyncRunner(QObject):
+    """
+    asyncio event loop running beside the Qt event loop.
+
+    The loop lives on its own thread, so network and process I/O never
+    blocks the GUI or delays its timers.  Coroutines are submitted from the
+    GUI thread and return a future that can be cancelled; completion
+    callbacks are delivered back on the GUI thread through a queued signal.
+    All HTTP requests share one pooled requests.Session.
+    """
+
+    finished = pyqtSignal(object, object)  # callback, future
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.finished.connect(self.deliver)
+        self.shutdown_hooks = []  # coroutine functions awaited before stopping
+        self.thread = threading.Thread(target=self.loop.run_forever, name="asyncio", daemon=True)
+        self.thread.start()
+
+    def submit(self, coro, callback=None):
+        """
+        Schedule coro on the asyncio loop.  If given, callback(result) is
+        called on the GUI thread once it completes successfully; if it
+        fails, the error is printed there either way.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(lambda done: self.finished.emit(callback, done))
+        return future
+
+    def deliver(self, callback, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error:
+            print(f"Background task failed: {error}")
+            return
+        if callback:
+            callback(future.result())
+
+    def shutdown(self):
+        """Run the shutdown hooks, then cancel pending tasks and stop the loop."""
+        for hook in self.shutdown_hooks:
+            try:
+                asyncio.run_coroutine_threadsafe(hook(), self.loop).result(timeout=5)
+            except Exception as e:
+                print(f"Shutdown hook failed: {e}")
+        def cancel_all():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(cancel_all)
+        self.thread.join(timeout=2)
+        self.session.close()
+
+
+_runner = None
+
+
+def get_runner():
+    """Return the application's shared AsyncRunner, creating it on first use."""
+    global _runner
+    if _runner is None:
+        _runner = AsyncRunner()
+    return _runner
+
+
+async def run_process(*args):
+    """Run a command to completion without output, and return its exit code."""
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return await process.wait()
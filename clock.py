@@ -1,7 +1,8 @@
 import os
 import json
-import subprocess
-from PyQt6.QtCore import QTimer, QTime, Qt, QDate
+import bisect
+from datetime import timedelta
+from PyQt6.QtCore import QTimer, Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
     QWidget,
@@ -12,12 +13,28 @@ from PyQt6.QtWidgets import (
     QFrame,
     QListWidgetItem,
     QGroupBox,
+    QComboBox,
 )
 
-ALERT_SOUND_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "resources/alert.wav"
+from aio import get_runner, run_process
+from scheduler import (
+    DEFAULT_PROFILE,
+    MEDICATIONS_PATH,
+    DoseTracker,
+    Schedule,
+    SystemClock,
+    alert_sound_command,
+    load_profiles,
+    parse_time,
 )
 
+# How long the names of due medications stay on screen after an alert
+ALERT_DISPLAY_MINUTES = 10
+# Doses alerted this late are shown as missed, with their time
+CATCH_UP_AFTER = timedelta(minutes=1)
+# More due doses than this are summed up as a count
+MAX_ALERT_NAMES = 6
+
 TRANSLATIONS_PATH = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), "resources/translations/clock.json"
 )
@@ -27,31 +44,66 @@ def load_translations():
     with open(TRANSLATIONS_PATH, "r") as file:
         return json.load(file)
 
-# Play alert sound
-def play_alert_sound():
-    if os.path.exists(ALERT_SOUND_PATH):
-        subprocess.Popen(
-            ["mpv", "--no-video", ALERT_SOUND_PATH],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-    else:
-        print("Alert sound file not found!")
-
 class MedicationReminderApp(QWidget):
-    def __init__(self, language="en"):
+    ticked = pyqtSignal(object)  # the time of each tick
+
+    def __init__(self, language="en", clock=None, medication_file=MEDICATIONS_PATH):
         super().__init__()
 
         self.translations = load_translations()  # Load translations
         self.language = language  # Set language from argument
+        self.clock = clock or SystemClock()  # Source of the current time
+        self.medication_file = medication_file
+
+        # Today's doses for the shown resident(s), rebuilt once per day
+        self.day_key = None
+        self.day_doses = []
+        self.day_minutes = []
+        # Doses shown in the lists, so they are only rebuilt when it changes
+        self.list_state = None
+        self.last_tick = None
+        self.alert_until = None
+        self.current_profile = None  # Resident shown, or None for everyone
+        self.dose_tracker = DoseTracker(self.clock)
+        self.low_power = False  # Minute-resolution display and ticks
 
         self.init_ui()
 
-        self.medications = self.load_medications()
+        self.load_medications()
+        # Single-shot precise timer re-armed on every tick, aligned to the
+        # start of the next second so the display never drifts or skips.
         self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_time)
-        self.timer.start(1000)  # Update every second
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+        self.tick()
+
+    def tick(self):
         self.update_time()
+        self.ticked.emit(self.last_tick)
+        now = self.last_tick  # The clock is read once per tick, in update_time
+        if self.low_power or not self.isVisible():
+            # Once a minute, on the minute, which is still exactly when doses are due
+            self.timer.start((60 - now.second) * 1000 - now.microsecond // 1000)
+        else:
+            self.timer.start(1000 - now.microsecond // 1000)  # Update every second
+
+    def set_low_power(self, enabled):
+        """Switch between the per-second display and a minute-resolution one."""
+        if enabled != self.low_power:
+            self.low_power = enabled
+            self.tick()
+
+    def showEvent(self, event):
+        # Hidden, the clock only ticks once a minute; catch up right away
+        super().showEvent(event)
+        self.tick()
+
+    def play_alert_sound(self):
+        """Play the alert sound on the asyncio loop, reaping mpv when it exits."""
+        command = alert_sound_command()
+        if command:
+            get_runner().submit(run_process(*command))
 
     def init_ui(self):
         self.setWindowTitle(self.translate("Medication Reminder"))
@@ -83,6 +135,13 @@ class MedicationReminderApp(QWidget):
 
         layout.addLayout(top_layout)
 
+        # Resident selector, shown only when there are several residents
+        self.profile_input = QComboBox(self)
+        self.profile_input.setFont(font)
+        self.profile_input.currentIndexChanged.connect(self.on_profile_selected)
+        self.profile_input.hide()
+        layout.addWidget(self.profile_input)
+
         # Divider Line after the time and date
         divider2 = QFrame(self)
         divider2.setFrameShape(QFrame.Shape.HLine)
@@ -132,66 +191,134 @@ class MedicationReminderApp(QWidget):
         self.countdown_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.countdown_label)
 
+        # Names of the medications that are due now
+        self.alert_label = QLabel("")
+        self.alert_label.setFont(QFont(font.family(), 20, QFont.Weight.Bold))
+        self.alert_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.alert_label.setWordWrap(True)
+        layout.addWidget(self.alert_label)
+
         self.setLayout(layout)
 
     # Load medications from JSON file
     def load_medications(self):
-        with open("medications.json", "r") as file:
-            data = json.load(file)
-        return data["medications"]
+        self.profiles = load_profiles(self.medication_file)
+        self.schedule = Schedule(self.profiles)
+        self.day_key = None
+        self.list_state = None
+        self.update_profile_selector()
+
+    def update_profile_selector(self):
+        """Fill the resident selector, keeping the current resident selected."""
+        names = sorted(self.profiles)
+        if self.current_profile not in names:
+            self.current_profile = None
+        self.profile_input.blockSignals(True)
+        self.profile_input.clear()
+        self.profile_input.addItem(self.translate("All residents"), None)
+        for name in names:
+            self.profile_input.addItem(self.profile_label(name), name)
+        self.profile_input.setCurrentIndex(self.profile_input.findData(self.current_profile))
+        self.profile_input.blockSignals(False)
+        self.profile_input.setVisible(len(names) > 1)
+
+    def on_profile_selected(self, index):
+        """Show the medications of the selected resident."""
+        self.current_profile = self.profile_input.itemData(index)
+        self.day_key = None
+        self.list_state = None
+        self.update_time()
+
+    def profile_label(self, name):
+        """Name shown for a resident; the unnamed one is the default resident."""
+        return name if name != DEFAULT_PROFILE else self.translate("Default")
+
+    def label_residents(self):
+        """Whether to label doses with their resident's name."""
+        return self.current_profile is None and len(self.profiles) > 1
 
     def translate(self, text):
         """Translate the text using the selected language."""
         return self.translations.get(self.language, {}).get(text, text)
 
     def update_time(self):
-        current_time = QTime.currentTime().toString("hh:mm:ss")
-        current_date = QDate.currentDate().toString("MM/dd/yyyy")
-        self.time_label.setText(f"{current_time}")
-        self.full_date_label.setText(f"{current_date}")
-
-        # Current time and day
-        current_day = QDate.currentDate().toString("dddd").lower()
-        today_medications = [
-            med
-            for med in self.medications
-            if any(day.lower() == current_day for day in med["days"])
-        ]
-
-        # Sort medications by time
-        today_medications.sort(key=lambda med: QTime.fromString(med["time"], "hh:mm"))
+        # Read the clock once, so every part of the tick agrees on the time
+        now = self.clock.now()
+        self.time_label.setText(now.strftime("%H:%M" if self.low_power else "%H:%M:%S"))
+        self.full_date_label.setText(now.strftime("%m/%d/%Y"))
+
+        # Today's medications, already sorted by time
+        day_key = (now.date(), self.current_profile)
+        if day_key != self.day_key:
+            self.day_key = day_key
+            self.day_doses = self.schedule.doses_for_day(now, self.current_profile)
+            self.day_minutes = [parse_time(time) for _, time, _ in self.day_doses]
+
+        # Doses up to the current minute are past, the rest are future
+        seconds_today = now.hour * 3600 + now.minute * 60 + now.second
+        split = bisect.bisect_right(self.day_minutes, seconds_today // 60)
+
+        list_state = (day_key, split)
+        if list_state != self.list_state:
+            self.list_state = list_state
+            self.update_medication_lists(self.day_doses[split:], self.day_doses[:split])
 
+        # Countdown to next medication
+        if split < len(self.day_doses):
+            remaining_time = self.day_minutes[split] * 60 - seconds_today
+            hours, remainder = divmod(remaining_time, 3600)
+            minutes, seconds = divmod(remainder, 60)
+            countdown = f"{hours:02}:{minutes:02}" if self.low_power else f"{hours:02}:{minutes:02}:{seconds:02}"
+        else:
+            countdown = "--:--" if self.low_power else "--:--:--"
+        self.countdown_label.setText(f"{self.translate('Next medication in:')} {countdown}")
+
+        # Alert when a dose time was reached since the previous tick, for
+        # any resident, whichever one is on screen, and catch up on doses
+        # skipped by a stall, a suspend or a clock change
+        due = self.dose_tracker.due_doses(self.schedule, now)
+        if due:
+            self.show_alert(due, now)
+        self.last_tick = now
+        if self.alert_until is not None and now >= self.alert_until:
+            self.alert_until = None
+            self.alert_label.setText("")
+
+    def show_alert(self, due, now):
+        """Play the alert sound and list who has to take what, and when if it was missed."""
+        names = []
+        missed = False
+        for when, name, resident in due:
+            if resident:
+                name = f"{resident}: {name}"
+            if now - when >= CATCH_UP_AFTER:
+                missed = True
+                name += when.strftime(" (%H:%M)" if when.date() == now.date() else " (%m/%d %H:%M)")
+            names.append(name)
+        if len(names) > MAX_ALERT_NAMES:
+            more = len(names) - MAX_ALERT_NAMES + 1
+            names[MAX_ALERT_NAMES - 1:] = [f"+{more} {self.translate('more')}"]
+        title = self.translate("Missed medication:" if missed else "Medication time:")
+        self.alert_label.setText(f"{title} {', '.join(names)}")
+        self.alert_until = now + timedelta(minutes=ALERT_DISPLAY_MINUTES)
+        self.play_alert_sound()
+
+    def update_medication_lists(self, future, past):
+        """Rebuild the future and past medication lists."""
+        label_residents = self.label_residents()
         self.med_list_widget_future.clear()
         self.med_list_widget_past.clear()
 
-        next_medication_time = None
-        for med in today_medications:
-            med_time = QTime.fromString(med["time"], "hh:mm")
-            item_text = f"{med['name']} - {med['time']}"
-            item = QListWidgetItem(item_text)
+        for name, time, resident in future:
+            if label_residents and resident:
+                name = f"{resident}: {name}"
+            item = QListWidgetItem(f"{name} - {time}")
             item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.med_list_widget_future.addItem(item)
 
-            if med_time > QTime.currentTime():
-                self.med_list_widget_future.addItem(item)
-                if not next_medication_time or med_time < next_medication_time:
-                    next_medication_time = med_time
-            else:
-                item_text = f"{med['name']}"
-                item = QListWidgetItem(item_text)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.med_list_widget_past.addItem(item)
-
-        # Countdown to next medication
-        if next_medication_time:
-            remaining_time = QTime.currentTime().secsTo(next_medication_time)
-            if remaining_time > 0:
-                hours, remainder = divmod(remaining_time, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                self.countdown_label.setText(
-                    f"{self.translate('Next medication in:')} {hours:02}:{minutes:02}:{seconds:02}"
-                )
-            else:
-                play_alert_sound()
-                self.countdown_label.setText(
-                    f"{self.translate('Next medication in:')} --:--:--"
-                )
+        for name, time, resident in past:
+            if label_residents and resident:
+                name = f"{resident}: {name}"
+            item = QListWidgetItem(f"{name}")
+            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.med_list_widget_past.addItem(item)
@@ -0,0 +1,146 @@
+import os
+import json
+import socket
+import selectors
+import resource
+from datetime import datetime
+
+from scheduler import MEDICATIONS_PATH, DoseTracker, Schedule, SystemClock, load_profiles, play_alert_sound
+
+# Longest time the daemon sleeps without checking medications.json for edits.
+MAX_IDLE_SECONDS = 60
+
+
+class ReminderDaemon:
+    """
+    Medication reminders without a display.
+
+    Runs only the schedule and the alert sound in a selectors loop that
+    sleeps until the next dose (or at most MAX_IDLE_SECONDS), so an idle
+    daemon wakes about once a minute and never imports PyQt6.  An optional
+    Unix control socket accepts one command per connection:
+
+        status   current schedule state and memory use, as JSON
+        reload   re-read medications.json
+        test     play the alert sound
+        quit     stop the daemon
+    """
+
+    def __init__(self, medication_file=MEDICATIONS_PATH, control_socket=None):
+        self.medication_file = medication_file
+        self.control_socket_path = control_socket
+        self.selector = selectors.DefaultSelector()
+        self.server = None
+        self.running = False
+        self.medications_mtime = None
+        self.schedule = Schedule({})
+        self.dose_tracker = DoseTracker(SystemClock())
+
+    def load_medications(self):
+        """Rebuild the schedule from medications.json."""
+        try:
+            self.medications_mtime = os.path.getmtime(self.medication_file)
+            self.schedule = Schedule(load_profiles(self.medication_file))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading {self.medication_file}: {e}")
+
+    def reload_if_changed(self):
+        """Reload medications.json if it was edited since the last load."""
+        try:
+            mtime = os.path.getmtime(self.medication_file)
+        except OSError:
+            return
+        if mtime != self.medications_mtime:
+            self.load_medications()
+
+    def open_control_socket(self):
+        """Listen on the Unix control socket, replacing a stale one."""
+        if os.path.exists(self.control_socket_path):
+            os.unlink(self.control_socket_path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.control_socket_path)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+
+    def close_control_socket(self):
+        if self.server:
+            self.selector.unregister(self.server)
+            self.server.close()
+            self.server = None
+            os.unlink(self.control_socket_path)
+
+    def handle_command(self, command):
+        """Execute a control command and return the JSON-serialisable reply."""
+        if command == "status":
+            when, doses = self.schedule.next_dose(datetime.now())
+            return {
+                "residents": len(self.schedule.profiles),
+                "doses": len(self.schedule),
+                "next_dose": when.strftime("%A %H:%M") if when else None,
+                "next_medications": [
+                    {"name": name, "resident": resident} for name, resident in doses
+                ],
+                # ru_maxrss is reported in kilobytes on Linux.
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            }
+        if command == "reload":
+            self.load_medications()
+            return {"doses": len(self.schedule)}
+        if command == "test":
+            play_alert_sound()
+            return {"ok": True}
+        if command == "quit":
+            self.running = False
+            return {"ok": True}
+        return {"error": f"unknown command: {command}"}
+
+    def serve_client(self):
+        """Answer one command from a control socket client."""
+        connection, _ = self.server.accept()
+        with connection:
+            connection.settimeout(1)
+            try:
+                command = connection.recv(1024).decode().strip()
+                reply = self.handle_command(command)
+                connection.sendall((json.dumps(reply) + "\n").encode())
+            except OSError as e:
+                print(f"Control socket error: {e}")
+
+    def fire_due_doses(self):
+        """Alert for every dose whose time arrived since the previous check, exactly once."""
+        due = self.dose_tracker.due_doses(self.schedule, datetime.now())
+        if due:
+            for when, name, resident in due:
+                print(f"{when.strftime('%m/%d %H:%M')} - {resident + ': ' if resident else ''}{name}")
+            play_alert_sound()
+
+    def seconds_until_next_dose(self):
+        now = datetime.now()
+        when, _ = self.schedule.next_dose(now)
+        if when is None:
+            return MAX_IDLE_SECONDS
+        return min(max((when - now).total_seconds(), 0), MAX_IDLE_SECONDS)
+
+    def run(self):
+        """Run the reminder loop until a quit command or Ctrl+C."""
+        self.load_medications()
+        if self.control_socket_path:
+            self.open_control_socket()
+        self.running = True
+        try:
+            while self.running:
+                for _ in self.selector.select(self.seconds_until_next_dose()):
+                    self.serve_client()
+                self.reload_if_changed()
+                self.fire_due_doses()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close_control_socket()
+        return 0
+
+
+def run_headless(control_socket=None):
+    """Entry point used by main.py --headless."""
+    return ReminderDaemon(control_socket=control_socket).run()
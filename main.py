@@ -1,6 +1,69 @@
 import sys
+import time
 import argparse
 import json
+from datetime import timedelta
+
+from power import Backlight, WakeupCounter, in_night_window, parse_night_window
+
+
+def parse_args():
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="Granny's Clock, Meds, Music & More App")
+    parser.add_argument(
+        "--lang",
+        default="en",
+        help="Language code for the app (e.g., 'en', 'es', 'fr')",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Run only the medication reminders, without a display",
+    )
+    parser.add_argument(
+        "--prewarm-favorite",
+        action="store_true",
+        help="Keep the top favorite radio station buffered so it starts instantly",
+    )
+    parser.add_argument(
+        "--control-socket",
+        default=None,
+        help="Unix socket path for controlling the headless reminder daemon",
+    )
+    parser.add_argument(
+        "--night",
+        type=parse_night_window,
+        default=None,
+        help="Night hours (e.g. 22:00-07:00) in which the screen dims and the clock shows minutes only",
+    )
+    parser.add_argument(
+        "--idle-minutes",
+        type=int,
+        default=0,
+        help="Dim the screen after this many minutes without a touch (0 = never)",
+    )
+    parser.add_argument(
+        "--dim-level",
+        type=int,
+        default=20,
+        help="Screen brightness in percent while dimmed",
+    )
+    parser.add_argument(
+        "--report-wakeups",
+        action="store_true",
+        help="Print the measured CPU wakeups per minute of the app",
+    )
+    return parser.parse_args()
+
+
+# The headless daemon is started before PyQt6 is imported, so it never pays
+# for the widget stack, the tabs or the radio catalog.
+if __name__ == "__main__":
+    args = parse_args()
+    if args.headless:
+        from headless import run_headless
+        sys.exit(run_headless(control_socket=args.control_socket))
+
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -8,13 +71,31 @@ from PyQt6.QtWidgets import (
     QTabWidget,
     QVBoxLayout,
     QLabel,
-    QScrollArea
+    QScrollArea,
+    QListView,
+    QStackedLayout,
+    QFrame,
+    QAbstractItemView
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QEvent, QPoint, QModelIndex, QPersistentModelIndex
+from PyQt6.QtGui import QFont
 
+from aio import get_runner
 from clock import MedicationReminderApp
 from medication_manager import MedicationManager
 from music import MusicWidget
+from news import NewsEngine, NewsModel
+
+# Wake the screen this long before a dose is due
+WAKE_BEFORE_DOSE_MINUTES = 5
+# At night without --idle-minutes, how long a touch keeps the screen awake
+NIGHT_TOUCH_SECONDS = 60
+WAKE_EVENTS = {
+    QEvent.Type.MouseButtonPress,
+    QEvent.Type.TouchBegin,
+    QEvent.Type.KeyPress,
+    QEvent.Type.Wheel,
+}
 
 # Load translations from JSON file
 TRANSLATIONS_PATH = "resources/translations/main.json"
@@ -45,15 +126,61 @@ class TranslatableWidget(QWidget):
 
 
 class NewsWidget(TranslatableWidget):
-    """A placeholder widget for the News tab."""
+    """Large-font headlines from the configured news feeds."""
     def __init__(self, language="en", parent=None):
         super().__init__(language, parent)
-        layout = QVBoxLayout(self)
-        label_text = self.translate("news_placeholder")
-        label = QLabel(label_text, self)
-        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(label)
-        self.setLayout(layout)
+        font = QFont()
+        font.setPointSize(17)
+
+        # Placeholder until the first headlines arrive
+        self.placeholder = QLabel(self.translate("news_placeholder"), self)
+        self.placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        self.model = NewsModel(self)
+        self.list_view = QListView(self)
+        self.list_view.setFont(font)
+        self.list_view.setWordWrap(True)
+        self.list_view.setSpacing(8)
+        self.list_view.setModel(self.model)
+
+        self.stack = QStackedLayout(self)
+        self.stack.addWidget(self.placeholder)
+        self.stack.addWidget(self.list_view)
+
+        # Show cached headlines right away, then refresh in the background.
+        self.engine = NewsEngine(parent=self)
+        self.engine.updated.connect(self.show_items)
+        self.show_items()
+        self.refresh()
+
+        self.refresh_interval = self.engine.config.get("refresh_minutes", 30) * 60
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(self.refresh_interval * 1000)
+
+    def refresh(self):
+        self.last_refresh = time.monotonic()
+        self.engine.refresh()
+
+    def set_low_power(self, enabled):
+        """Stop refreshing the feeds while the screen sleeps, catching up on waking."""
+        if enabled:
+            self.refresh_timer.stop()
+        elif not self.refresh_timer.isActive():
+            self.refresh_timer.start(self.refresh_interval * 1000)
+            if time.monotonic() - self.last_refresh >= self.refresh_interval:
+                self.refresh()
+
+    def show_items(self):
+        """Display the current news snapshot, keeping the headline at the top of the view in place."""
+        items = self.engine.store.snapshot()
+        spacing = self.list_view.spacing()
+        top = QPersistentModelIndex(self.list_view.indexAt(QPoint(spacing, spacing)))
+        scrolled = top.isValid() and top.row() > 0  # New headlines stay in sight at the top
+        self.model.set_items(items)
+        if scrolled and top.isValid():
+            self.list_view.scrollTo(QModelIndex(top), QAbstractItemView.ScrollHint.PositionAtTop)
+        self.stack.setCurrentWidget(self.list_view if items else self.placeholder)
 
 
 class CreditsWidget(TranslatableWidget):
@@ -84,7 +211,14 @@ class CreditsWidget(TranslatableWidget):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, language="en"):
+    """
+    The tabs of the app, plus the night/idle power mode: at night or after
+    idle_minutes without a touch, the screen is dimmed, the clock ticks
+    once a minute and background refreshes are held.  A touch or an
+    upcoming dose wakes everything up again.
+    """
+    def __init__(self, language="en", prewarm=False, night=None, idle_minutes=0,
+                 dim_level=20, report_wakeups=False):
         super().__init__()
         self.language = language
         self.setWindowTitle("Granny's Clock, Meds, Music & More")
@@ -103,7 +237,7 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.news_tab, self.translate("News"))
 
         # --- Tab 3: Music ---
-        self.music_tab = MusicWidget(language=self.language)  # Add the MusicWidget here
+        self.music_tab = MusicWidget(language=self.language, prewarm=prewarm)  # Add the MusicWidget here
         self.tabs.addTab(self.music_tab, self.translate("Music"))
 
         # --- Tab 4: Editor ---
@@ -121,22 +255,104 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.tabs)
         self.setCentralWidget(central_widget)
 
+        # Night/idle power mode
+        self.night = night  # (start, end) minutes of the day, or None
+        self.idle_seconds = idle_minutes * 60
+        self.low_power = False
+        self.last_activity = time.monotonic()
+        self.backlight = Backlight(dim_level / 100)
+        # Dims the window when the backlight itself cannot be dimmed
+        self.dim_overlay = QFrame(central_widget)
+        self.dim_overlay.setStyleSheet(
+            f"background-color: rgba(0, 0, 0, {round(255 * (1 - dim_level / 100))});"
+        )
+        self.dim_overlay.hide()
+        self.clock_tab.ticked.connect(self.update_power_mode)
+        if self.night or self.idle_seconds:
+            # Every event of the app passes through the filter, so only
+            # watch for touches when they can keep the screen awake
+            QApplication.instance().installEventFilter(self)
+
+        # Optional report of the measured wakeups, one line per minute
+        self.wakeups = WakeupCounter()
+        self.wakeup_timer = QTimer(self)
+        self.wakeup_timer.timeout.connect(self.report_wakeups)
+        if report_wakeups:
+            self.restart_wakeup_count()
+
+    def eventFilter(self, watched, event):
+        if event.type() in WAKE_EVENTS:
+            self.last_activity = time.monotonic()
+            if self.low_power:
+                self.set_low_power(False)
+                return True  # The first touch only wakes the screen
+        return super().eventFilter(watched, event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.dim_overlay.setGeometry(self.centralWidget().rect())
+
+    def should_sleep(self, now):
+        """Whether the app should be in low power mode at the clock time now."""
+        if self.clock_tab.alert_until is not None:
+            return False
+        when, _ = self.clock_tab.schedule.next_dose(now)
+        if when is not None and when - now <= timedelta(minutes=WAKE_BEFORE_DOSE_MINUTES):
+            return False
+        idle = time.monotonic() - self.last_activity
+        if self.night and in_night_window(self.night, now):
+            return idle >= (self.idle_seconds or NIGHT_TOUCH_SECONDS)
+        return bool(self.idle_seconds) and idle >= self.idle_seconds
+
+    def update_power_mode(self, now):
+        """Checked on every clock tick."""
+        self.set_low_power(self.should_sleep(now))
+
+    def set_low_power(self, enabled):
+        if enabled == self.low_power:
+            return
+        self.low_power = enabled
+        if enabled:
+            self.tabs.setCurrentWidget(self.clock_tab)
+            if not self.backlight.dim():
+                self.dim_overlay.setGeometry(self.centralWidget().rect())
+                self.dim_overlay.raise_()
+                self.dim_overlay.show()
+        else:
+            self.backlight.restore()
+            self.dim_overlay.hide()
+        self.clock_tab.set_low_power(enabled)
+        self.news_tab.set_low_power(enabled)
+        self.music_tab.set_low_power(enabled)
+        if self.wakeup_timer.isActive():
+            self.restart_wakeup_count()
+
+    def restart_wakeup_count(self):
+        """Start a new one-minute measurement, so each one covers a single mode."""
+        if self.wakeups.take() is None:
+            print("CPU wakeups cannot be measured on this system")
+            return
+        self.wakeup_timer.start(60 * 1000)
+
+    def report_wakeups(self):
+        mode = "low power" if self.low_power else "normal"
+        print(f"CPU wakeups in the last minute ({mode}): {self.wakeups.take()}")
+
     def translate(self, text):
         """Translate the text using the selected language."""
         return load_translations().get(self.language, {}).get(text, text)
 
 
 if __name__ == "__main__":
-    # Set up argument parser
-    parser = argparse.ArgumentParser(description="Granny's Clock, Meds, Music & More App")
-    parser.add_argument(
-        "--lang",
-        default="en",
-        help="Language code for the app (e.g., 'en', 'es', 'fr')",
-    )
-    args = parser.parse_args()
-    
     app = QApplication(sys.argv)
-    window = MainWindow(language=args.lang)
+    app.aboutToQuit.connect(get_runner().shutdown)
+    window = MainWindow(
+        language=args.lang,
+        prewarm=args.prewarm_favorite,
+        night=args.night,
+        idle_minutes=args.idle_minutes,
+        dim_level=args.dim_level,
+        report_wakeups=args.report_wakeups,
+    )
     window.show()
     sys.exit(app.exec())
@@ -1,14 +1,15 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit,
-    QComboBox, QListWidget, QListWidgetItem, QGridLayout, QGroupBox, QWidget,
-    QScrollArea
+    QComboBox, QListWidget, QListWidgetItem, QGroupBox
 )
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
 import json
 import os
 from datetime import datetime
 
+from scheduler import DEFAULT_PROFILE, load_profiles, save_profiles
+from touch_keyboard import TouchKeyboard, NameTrie, load_drug_names
+
 TRANSLATIONS_PATH = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), "resources/translations/editor.json"
 )
@@ -27,8 +28,9 @@ class MedicationManager(QDialog):
         self.translations = load_translations()  # Load translations
         self.language = language  # Set language from argument
         
-        self.medication_file = "medications.json"
+        self.medication_file = parent.medication_file  # Same file as the clock tab
         self.load_medications()  # Load medications on initialization
+        self.build_name_trie()
 
         self.setWindowTitle(self.translate("Medication Manager"))
         self.setGeometry(100, 100, 800, 600)
@@ -41,7 +43,6 @@ class MedicationManager(QDialog):
         # Left group for Keyboard section
         keyboard_group = QGroupBox(self.translate("Keyboard"), self)
         keyboard_layout = QVBoxLayout()
-        # Create scrollable keyboard layout
         self.create_keyboard(keyboard_layout)
         keyboard_group.setLayout(keyboard_layout)
 
@@ -49,6 +50,17 @@ class MedicationManager(QDialog):
         app_group = QGroupBox(self.translate("Medication Management"), self)
         app_layout = QVBoxLayout()
 
+        # Resident selector, shown only when there are several residents
+        self.profile_input = QComboBox(self)
+        self.profile_input.setFont(QFont("Arial", 12))
+        for name in sorted(self.profiles):
+            label = name if name != DEFAULT_PROFILE else self.translate("Default")
+            self.profile_input.addItem(label, name)
+        self.profile_input.setCurrentIndex(self.profile_input.findData(self.profile))
+        self.profile_input.currentIndexChanged.connect(self.on_profile_selected)
+        self.profile_input.setVisible(len(self.profiles) > 1)
+        app_layout.addWidget(self.profile_input)
+
         # Medication List
         self.med_list_widget = QListWidget(self)
         self.med_list_widget.setFont(QFont("Arial", 12))
@@ -60,6 +72,7 @@ class MedicationManager(QDialog):
         self.name_input = QLineEdit(self)
         self.name_input.setPlaceholderText(self.translate("Medication Name"))
         self.name_input.setFont(QFont("Arial", 12))
+        self.name_input.textChanged.connect(self.update_suggestions)
         name_input_layout.addWidget(self.name_input)
 
         self.clear_button = QPushButton(self.translate("Clear"), self)
@@ -137,50 +150,36 @@ class MedicationManager(QDialog):
 
     def create_keyboard(self, parent_layout):
         """
-        Create and display a keyboard with keys arranged in 4 columns inside a scrollable area.
+        Create the on-screen keyboard and connect it to the medication name input.
         """
-        # Create a QScrollArea, set it to be resizable, and disable horizontal scrolling
-        scroll_area = QScrollArea(self)
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-
-        # Create a container widget and assign it a layout
-        scroll_widget = QWidget()
-        keyboard_layout = QVBoxLayout(scroll_widget)
-
-        # Use a grid layout for the keys with 4 columns
-        grid_layout = QGridLayout()
-        # Get the flat list of keys
-        keys = self.load_keyboard_layout("letters")
-
-        # Create buttons and add them to the grid layout
-        for index, key in enumerate(keys):
-            row = index // 4
-            col = index % 4
-            button = QPushButton(key, self)
-            # Capture the key in the lambda to avoid late-binding issues
-            button.clicked.connect(lambda _, key=key: self.add_to_name(key))
-            button.setFixedSize(80, 80)  # Set button size
-            grid_layout.addWidget(button, row, col)
-
-        keyboard_layout.addLayout(grid_layout)
-        scroll_area.setWidget(scroll_widget)
-        parent_layout.addWidget(scroll_area)
-
-    def load_keyboard_layout(self, type_of_layout):
+        self.keyboard = TouchKeyboard(self.language, self.translate("Space"), self)
+        self.keyboard.keyPressed.connect(self.add_to_name)
+        self.keyboard.backspacePressed.connect(lambda: self.name_input.backspace())
+        self.keyboard.suggestionChosen.connect(lambda name: self.name_input.setText(name))
+        self.keyboard.set_suggestions(self.name_trie.complete(""))
+        parent_layout.addWidget(self.keyboard)
+
+    def build_name_trie(self):
         """
-        Load the keyboard layout from a hardcoded flat list.
-        Returns a flat list of keys.
+        Build the completion trie from existing medication names, which are
+        suggested before the common drug names.
         """
-        layout = {
-            "letters": [
-                "a", "b", "c", "d", "e", "f", "g", "h", "i", "j",
-                "k", "l", "m", "n", "o", "p", "q", "r", "s", "t",
-                "u", "v", "w", "x", "y", "z", "1", "2", "3", "4",
-                "5", "6", "7", "8", "9"
-            ]
-        }
-        return layout.get(type_of_layout, [])
+        self.name_trie = NameTrie()
+        for medications in self.profiles.values():
+            for med in medications:
+                self.name_trie.insert(med["name"], rank=0)
+        for name in load_drug_names():
+            self.name_trie.insert(name, rank=1)
+
+    def update_suggestions(self, text):
+        """
+        Offer completions for the typed medication name.
+        """
+        suggestions = self.name_trie.complete(text.strip())
+        # Nothing left to complete once the full name has been typed.
+        if suggestions == [text.strip()]:
+            suggestions = []
+        self.keyboard.set_suggestions(suggestions)
 
     def add_to_name(self, character):
         """
@@ -245,6 +244,7 @@ class MedicationManager(QDialog):
             else:
                 # New medication, add it
                 self.medications.append({"name": name, "time": time, "days": [day]})
+                self.name_trie.insert(name, rank=0)
 
             # Save medications and update UI
             self.save_medications()  # Save after adding/merging
@@ -268,30 +268,45 @@ class MedicationManager(QDialog):
                 med for med in self.medications
                 if not (med["name"] == name and med["time"] == time)
             ]
+            self.profiles[self.profile] = self.medications
             self.save_medications()  # Save after removal
-            self.parent.load_medications()
             self.parent.update_time()  # Ask parent to update UI after removal
             self.refresh_medication_list()  # Refresh the list
+            # Stop suggesting the name unless another dose still uses it
+            self.build_name_trie()
+            self.update_suggestions(self.name_input.text())
 
     def load_medications(self):
         """
-        Load medications from the JSON file.
+        Load every resident's medications from the JSON file and select the
+        first resident.
         """
         if os.path.exists(self.medication_file):
-            with open(self.medication_file, "r") as file:
-                data = json.load(file)
-                self.medications = data.get("medications", [])
+            self.profiles = load_profiles(self.medication_file)
         else:
-            self.medications = []
+            self.profiles = {}
+        if not self.profiles:
+            self.profiles = {DEFAULT_PROFILE: []}
+        self.profile = sorted(self.profiles)[0]
+        self.medications = self.profiles[self.profile]
+
+    def on_profile_selected(self, index):
+        """
+        Edit the medications of the selected resident.
+        """
+        profile = self.profile_input.itemData(index)
+        if profile in self.profiles:
+            self.profile = profile
+            self.medications = self.profiles[profile]
+            self.refresh_medication_list()
 
     def save_medications(self):
         """
-        Save medications to the JSON file.
+        Save every resident's medications to the JSON file.
         """
-        with open(self.medication_file, "w") as file:
-            json.dump({"medications": self.medications}, file, indent=4)
+        save_profiles(self.profiles, self.medication_file)
 
-        self.parent.medications = self.parent.load_medications()
+        self.parent.load_medications()
         self.parent.update_time()
 
     def translate(self, text):
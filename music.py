@@ -1,18 +1,32 @@
 import os
-import subprocess
 import json
-import requests
 import time
-from PyQt6.QtCore import QStringListModel
-from PyQt6.QtWidgets import QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListView, QAbstractItemView
+from PyQt6.QtCore import QStringListModel, QTimer
+from PyQt6.QtWidgets import QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListView, QAbstractItemView, QLabel
 from PyQt6.QtGui import QFont
 
+from aio import get_runner
+from player import MpvPlayer
+from radio_catalog import (
+    StationCatalog,
+    StationPicks,
+    load_radio_stations,
+    radio_stations_outdated,
+    refresh_radio_stations,
+)
+from stream_metadata import StreamMonitor
+
 
 # Define paths
 MUSIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/music/files")
 TRANSLATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/translations/music.json")
-RADIO_STATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/music/radio_stations.json")
-RADIO_STATIONS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/music/radio_stations_cache.json")
+
+# A paused live stream keeps its oldest audio buffered, so the warm player
+# is restarted regularly to keep what it plays on resume close to live.
+PREWARM_REFRESH_MS = 10 * 60 * 1000
+PREWARM_OPTIONS = ["--cache=yes", "--demuxer-max-bytes=1MiB"]
+# How often the radio catalog snapshot is checked for being outdated
+STATIONS_CHECK_MS = 60 * 60 * 1000
 
 # Load translations from JSON file
 def load_translations():
@@ -20,114 +34,8 @@ def load_translations():
         return json.load(file)
         
 
-def fetch_radio_stations_from_radio_browser(country):
-    """Fetch radio stations for a specific country from RadioBrowser."""
-    url = f"https://de1.api.radio-browser.info/json/stations/bycountry/{country}"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        return response.json()  # Return list of stations
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching stations for {country}: {e}")
-        return []
-
-def is_cache_valid():
-    """Check if the radio stations cache is valid (not older than a week)."""
-    if not os.path.exists(RADIO_STATIONS_CACHE_PATH):
-        return False
-    
-    with open(RADIO_STATIONS_CACHE_PATH, "r") as file:
-        cache_data = json.load(file)
-    
-    last_update = cache_data.get("last_update", 0)
-    one_week_in_seconds = 7 * 24 * 60 * 60  # 1 week in seconds
-    current_time = time.time()
-    
-    return current_time - last_update < one_week_in_seconds
-
-def remove_duplicates(stations):
-    """Remove duplicates from the list of radio stations based on 'name' and save only necessary fields."""
-    seen = set()
-    unique_stations = []
-    
-    for station in stations:
-        station_name = station.get('name')
-        if station_name and station_name not in seen:
-            # Only keep country, name, and url
-            filtered_station = {
-                "country": station.get("country", ""),
-                "name": station_name,
-                "url": station.get("url", "")
-            }
-            unique_stations.append(filtered_station)
-            seen.add(station_name)
-    
-    return unique_stations
-
-def load_radio_stations():
-    """Load radio stations from cache or fetch them if the cache is outdated."""
-    # Load local radio stations from the RADIO_STATIONS_PATH file
-    if os.path.exists(RADIO_STATIONS_PATH):
-        with open(RADIO_STATIONS_PATH, "r") as file:
-            local_stations = json.load(file)
-    else:
-        local_stations = {}
-
-    # If cache is valid, load data from the cache
-    if is_cache_valid():
-        with open(RADIO_STATIONS_CACHE_PATH, "r") as file:
-            cached_data = json.load(file)
-        return cached_data["stations"]
-    
-    # Fetch radio stations from RadioBrowser
-    countries_to_fetch = ["Israel", "United Kingdom", "United States", "Canada"]
-    merged_stations = {}
-
-    # Add RadioBrowser stations to the local stations for each country
-    for country in countries_to_fetch:
-        stations = fetch_radio_stations_from_radio_browser(country)
-        if country not in merged_stations:
-            merged_stations[country] = []
-        merged_stations[country].extend(stations)
-    
-    # Add local stations to merged_stations
-    for country, stations in local_stations.items():
-        if country not in merged_stations:
-            merged_stations[country] = []
-        merged_stations[country].extend(stations)
-    
-    # Remove duplicates and keep only necessary fields (country, name, url)
-    for country in merged_stations:
-        if isinstance(merged_stations[country], list):
-            merged_stations[country] = remove_duplicates(merged_stations[country])
-
-    # Sort the stations alphabetically by station name
-    for country in merged_stations:
-        if isinstance(merged_stations[country], list):
-            merged_stations[country].sort(key=lambda station: station.get('name', '').lower())
-
-    # Save the updated stations and the current time to the cache
-    with open(RADIO_STATIONS_CACHE_PATH, "w") as file:
-        json.dump({
-            "stations": merged_stations,
-            "last_update": time.time()
-        }, file)
-
-    return merged_stations
-
-# Play local music
-def play_music(music_files):
-    if music_files:
-        music_command = ["mpv", "--no-video", "--loop", "--shuffle"] + music_files
-        subprocess.Popen(music_command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-# Play radio stream
-def play_radio(station_url):
-    radio_command = ["mpv", "--no-video", station_url]
-    subprocess.Popen(radio_command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
 class MusicWidget(QWidget):
-    def __init__(self, parent=None, language="en"):
+    def __init__(self, parent=None, language="en", prewarm=False):
         super().__init__(parent)
 
         self.language = language  # Set language from argument
@@ -171,9 +79,9 @@ class MusicWidget(QWidget):
         radio_stations_layout = QHBoxLayout(radio_stations)  # Horizontal layout for country and station lists
 
         # Vertical split for radio: Countries list and Stations list
-        self.radio_stations = load_radio_stations()
-        countries = sorted(self.radio_stations.keys())
-        self.country_model = QStringListModel(countries)
+        # The catalog is loaded in the background, see on_stations_loaded.
+        self.radio_stations = StationCatalog()
+        self.country_model = QStringListModel([])
         self.country_list_view = QListView(self)
         self.country_list_view.setModel(self.country_model)
         self.country_list_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
@@ -184,11 +92,21 @@ class MusicWidget(QWidget):
         self.station_model = QStringListModel([])
         self.station_list_view.setModel(self.station_model)
         self.station_list_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.station_list_view.clicked.connect(self.on_station_selected)
 
         # Unified Play/Pause button for radio
         self.play_pause_button_radio = QPushButton(self.translate("Play Station"), self)
         self.play_pause_button_radio.clicked.connect(self.play_pause_radio)
 
+        # Favorite toggle for the selected station
+        self.favorite_button = QPushButton(self.translate("Add to Favorites"), self)
+        self.favorite_button.clicked.connect(self.toggle_favorite)
+        self.favorite_button.setEnabled(False)
+
+        # What the playing station is broadcasting right now
+        self.now_playing_label = QLabel("", self)
+        self.now_playing_label.setWordWrap(True)
+
         # Add the country and station lists to the radio_stations_layout
         radio_stations_layout.addWidget(self.country_list_view)
         radio_stations_layout.addWidget(self.station_list_view)
@@ -196,8 +114,10 @@ class MusicWidget(QWidget):
         # Add the radio_stations widget (containing the two lists) to the radio_layout
         radio_layout.addWidget(radio_stations)
 
-        # Add the play/pause button to the radio_layout
+        # Add the favorite and play/pause buttons to the radio_layout
+        radio_layout.addWidget(self.favorite_button)
         radio_layout.addWidget(self.play_pause_button_radio)
+        radio_layout.addWidget(self.now_playing_label)
 
         # Add tabs to tab widget
         self.tabs.addTab(local_music_tab, self.translate("Local Music"))
@@ -208,24 +128,172 @@ class MusicWidget(QWidget):
         self.setLayout(layout)
 
         # State tracking
+        self.runner = get_runner()
+        self.player = MpvPlayer()
+        self.stream_monitor = StreamMonitor(self.runner, self)
+        self.stream_monitor.changed.connect(self.show_now_playing)
+        self.picks = StationPicks().load()
+        self.pick_lists = {
+            self.translate("Favorites"): self.picks.favorites,
+            self.translate("Recent"): self.picks.recent,
+        }
+        self.visible_picks = None  # (name, url) list when a pick list is shown
+        self.current_country = None
+        self.current_station = None
+
+        # Optional second player holding the top favorite paused and buffered
+        self.prewarm = prewarm
+        self.warm_player = MpvPlayer("warm")
+        self.prewarmed_at = 0  # time.monotonic() of the last warm player start
+        self.prewarm_timer = QTimer(self)
+        self.prewarm_timer.timeout.connect(lambda: self.prewarm_favorite(refresh=True))
+        if self.prewarm:
+            self.prewarm_timer.start(PREWARM_REFRESH_MS)
+        # Do not leave mpv running (or paused in the background) on exit
+        self.runner.shutdown_hooks += [self.player.stop, self.warm_player.stop]
         self.radio_playing = False
         self.local_music_playing = False
         self.music_files = [f for f in os.listdir(MUSIC_DIR) if f.endswith((".mp3", ".wav", ".flac"))]
         self.music_files.sort()  # Sort the files alphabetically
         self.playlist = self.music_files
-        self.current_station_url = None
 
-        # Handle empty music or radio stations
-        if not self.music_files and not self.radio_stations:
-            self.current_song_label.setText(self.translate("No local music or radio stations available. Please add music files or select radio stations."))
-        elif not self.music_files:
+        # Handle empty music; empty radio stations are handled once loaded
+        if not self.music_files:
             self.tabs.removeTab(0)  # Remove the local music tab if no music files are present
-        elif not self.radio_stations:
-            self.tabs.removeTab(1)  # Remove the radio tab if no radio stations are present
 
         # Initialize the playlist view with all songs
         self.update_playlist_view()
 
+        self.stations_task = self.runner.submit(
+            load_radio_stations(), self.on_stations_loaded
+        )
+        # A long-running app refreshes the catalog once it goes out of date
+        self.stations_checked_at = time.monotonic()
+        self.stations_timer = QTimer(self)
+        self.stations_timer.timeout.connect(self.check_stations)
+        self.stations_timer.start(STATIONS_CHECK_MS)
+
+    def on_stations_loaded(self, snapshot):
+        """Show the last radio catalog snapshot, then refresh it in the background if outdated."""
+        catalog, is_valid = snapshot
+        self.show_stations(catalog)
+        self.prewarm_favorite()
+        if is_valid:
+            self.remove_radio_tab_if_empty()
+        else:
+            self.stations_task = self.runner.submit(refresh_radio_stations(), self.on_stations_refreshed)
+
+    def check_stations(self):
+        """Refresh the radio catalog if its snapshot is outdated, unless that is already under way."""
+        self.stations_checked_at = time.monotonic()
+        if self.stations_task.done():
+            self.stations_task = self.runner.submit(radio_stations_outdated(), self.on_stations_checked)
+
+    def on_stations_checked(self, outdated):
+        if outdated:
+            self.stations_task = self.runner.submit(refresh_radio_stations(), self.on_stations_refreshed)
+
+    def on_stations_refreshed(self, catalog):
+        """Swap in the new snapshot, which is only delivered once complete."""
+        if catalog is not None:
+            self.show_stations(catalog)
+        self.remove_radio_tab_if_empty()
+
+    def show_stations(self, catalog):
+        self.radio_stations = catalog
+        self.update_country_list()
+        # Rows index into the catalog, so the shown station list must follow it
+        if self.visible_picks is None and self.current_country is not None:
+            self.station_model.setStringList(catalog.station_names(self.current_country))
+
+    def remove_radio_tab_if_empty(self):
+        if not self.radio_stations and not self.picks.favorites and self.music_files:
+            self.tabs.removeTab(1)  # Remove the radio tab if no radio stations are present
+
+    def update_country_list(self):
+        """Show the favorites and recent stations first, then the countries."""
+        picks = [name for name, stations in self.pick_lists.items() if stations]
+        entries = picks + self.radio_stations.country_names()
+        if entries == self.country_model.stringList():
+            return
+        self.country_model.setStringList(entries)
+        # Keep the selected entry highlighted after rows moved
+        if self.current_country in entries:
+            row = entries.index(self.current_country)
+            self.country_list_view.setCurrentIndex(self.country_model.index(row))
+
+    def prewarm_favorite(self, refresh=False):
+        """
+        Keep the top favorite started, paused and buffered in the warm
+        player, so pressing play on it only has to unpause.
+        """
+        if not self.prewarm:
+            return
+        station = self.picks.top_favorite()
+        if not station or (self.radio_playing and self.current_station == station):
+            self.runner.submit(self.warm_player.stop())
+        elif refresh or self.warm_player.source != station[1]:
+            self.runner.submit(self.warm_player.play(PREWARM_OPTIONS + [station[1]], paused=True))
+            self.prewarmed_at = time.monotonic()
+
+    def set_low_power(self, enabled):
+        """Hold off checking the radio catalog and restarting the warm player while the screen sleeps."""
+        if enabled:
+            self.stations_timer.stop()
+        elif not self.stations_timer.isActive():
+            self.stations_timer.start(STATIONS_CHECK_MS)
+            if time.monotonic() - self.stations_checked_at >= STATIONS_CHECK_MS / 1000:
+                self.check_stations()
+        if not self.prewarm:
+            return
+        if enabled:
+            self.prewarm_timer.stop()
+        elif not self.prewarm_timer.isActive():
+            self.prewarm_timer.start(PREWARM_REFRESH_MS)
+            stale = time.monotonic() - self.prewarmed_at >= PREWARM_REFRESH_MS / 1000
+            self.prewarm_favorite(refresh=stale)
+
+    def showEvent(self, event):
+        # Now-playing information is only polled while it can be seen
+        super().showEvent(event)
+        if self.radio_playing and self.player.source:
+            self.stream_monitor.start(self.player, self.player.source)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.stream_monitor.stop()
+
+    def start_station(self, station):
+        """Play a station, swapping in the warm player if it already holds it."""
+        if self.prewarm and self.warm_player.playing and self.warm_player.source == station[1]:
+            self.player, self.warm_player = self.warm_player, self.player
+            self.runner.submit(self.player.resume_or_play([station[1]]))
+            self.runner.submit(self.warm_player.stop())
+        else:
+            self.runner.submit(self.player.play([station[1]]))
+        self.stream_monitor.start(self.player, station[1])
+        self.picks.played(station)
+        self.update_country_list()
+
+    def show_now_playing(self, info):
+        """Show the stream title, bitrate and buffer health under the play button."""
+        if info.get("stopped"):
+            self.now_playing_label.setText(self.translate("Stream stopped"))
+            return
+        lines = [info["title"]] if info.get("title") else []
+        if info.get("buffering"):
+            lines.append(self.translate("Buffering..."))
+        elif info.get("bitrate"):
+            status = f"{info['bitrate']} {self.translate('kbps')}"
+            if info.get("buffer") is not None:
+                status += f" · {self.translate('Buffer')} {info['buffer']:.0f} s"
+            lines.append(status)
+        self.now_playing_label.setText("\n".join(lines))
+
+    def stop_now_playing(self):
+        self.stream_monitor.stop()
+        self.now_playing_label.setText("")
+
     def translate(self, text):
         """Translate the text using the selected language."""
         return self.translations.get(self.language, {}).get(text, text)
@@ -235,68 +303,90 @@ class MusicWidget(QWidget):
         if self.music_files:
             self.playlist_model.setStringList(self.playlist)
 
-    def play_pause_radio(self): #BROKEN, DOES NOT SWITCH
+    def play_pause_radio(self):
         """Play or pause the selected radio station."""
         if self.radio_playing:
-            subprocess.Popen(["pkill", "mpv"])  # Kill the radio stream
+            self.runner.submit(self.player.stop())  # Stop the radio stream
+            self.stop_now_playing()
             self.play_pause_button_radio.setText(self.translate("Play Station"))
             self.radio_playing = False
             self.play_pause_button_local.setText(self.translate("Play Music"))
+            self.prewarm_favorite()
         else:
-            # If local music is playing, stop it first
+            # If local music is playing, the player replaces it
             if self.local_music_playing:
-                subprocess.Popen(["pkill", "mpv"])  # Kill local music
                 self.local_music_playing = False
                 self.play_pause_button_local.setText(self.translate("Play Music"))
             
             # Play the radio stream
-            if self.current_station_url:
-                play_radio(self.current_station_url)
+            if self.current_station:
+                self.start_station(self.current_station)
                 self.play_pause_button_radio.setText(self.translate("Stop Station"))
                 self.radio_playing = True
 
-    def toggle_local_music(self): #BROKEN, DOES NOT SWITCH
+    def toggle_local_music(self):
         """Toggle between playing and stopping local music."""
         if self.local_music_playing:
-            subprocess.Popen(["pkill", "mpv"])  # Kill local music
+            self.runner.submit(self.player.stop())  # Stop local music
             self.play_pause_button_local.setText(self.translate("Play Music"))
             self.local_music_playing = False
             self.play_pause_button_radio.setText(self.translate("Play Station"))
         else:
-            # If radio is playing, stop it first
+            # If radio is playing, the player replaces it
             if self.radio_playing:
-                subprocess.Popen(["pkill", "mpv"])  # Kill radio
                 self.radio_playing = False
                 self.play_pause_button_radio.setText(self.translate("Play Station"))
+                self.stop_now_playing()
             
             # Play local music
-            play_music([os.path.join(MUSIC_DIR, song) for song in self.playlist])
+            music_files = [os.path.join(MUSIC_DIR, song) for song in self.playlist]
+            self.runner.submit(self.player.play(["--loop", "--shuffle"] + music_files))
             self.play_pause_button_local.setText(self.translate("Stop Music"))
             self.local_music_playing = True
         
     def on_country_selected(self, index):
         """Update the station list when a country is selected."""
         country = self.country_model.data(index)
-        stations = self.radio_stations.get(country, [])
-        station_names = [station["name"] for station in stations]
-        self.station_model.setStringList(station_names)
+        self.current_country = country
+        self.visible_picks = self.pick_lists.get(country)
+        if self.visible_picks is not None:
+            # Copy, as playing a station reorders the recent list
+            self.visible_picks = list(self.visible_picks)
+            self.station_model.setStringList([name for name, _ in self.visible_picks])
+        else:
+            self.station_model.setStringList(self.radio_stations.station_names(country))
     
-        # Reset station selection and update current station URL
+        # Reset station selection and update current station
         self.station_list_view.selectionModel().clearSelection()
-        self.current_station_url = None
-    
-        # Update the station list view to handle selection
-        self.station_list_view.clicked.connect(self.on_station_selected)
+        self.current_station = None
+        self.favorite_button.setEnabled(False)
 
     def on_station_selected(self, index):
         """Update the current station URL when a station is selected."""
-        country = self.country_list_view.selectionModel().currentIndex().data()
-        station_name = self.station_model.data(index)
-        stations = self.radio_stations.get(country, [])
-        station_url = next(station["url"] for station in stations if station["name"] == station_name)
-        self.current_station_url = station_url
+        if self.visible_picks is not None:
+            self.current_station = self.visible_picks[index.row()]
+        else:
+            # Rows follow the catalog order, so the row is the station index.
+            url = self.radio_stations.station_url(self.current_country, index.row())
+            self.current_station = (self.station_model.data(index), url)
+        self.update_favorite_button()
 
         if self.radio_playing:
             self.play_pause_button_radio.setText(self.translate("Pause Station"))
         else:
             self.play_pause_button_radio.setText(self.translate("Play Station"))
+
+    def update_favorite_button(self):
+        if self.picks.is_favorite(self.current_station):
+            self.favorite_button.setText(self.translate("Remove from Favorites"))
+        else:
+            self.favorite_button.setText(self.translate("Add to Favorites"))
+        self.favorite_button.setEnabled(self.current_station is not None)
+
+    def toggle_favorite(self):
+        """Add or remove the selected station from the favorites."""
+        if self.current_station:
+            self.picks.toggle_favorite(self.current_station)
+            self.update_favorite_button()
+            self.update_country_list()
+            self.prewarm_favorite()
@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+import requests
+from PyQt6.QtCore import QObject, QAbstractListModel, QModelIndex, Qt, pyqtSignal
+
+from aio import HTTP_TIMEOUT, get_runner
+
+NEWS_FEEDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/news_feeds.json")
+NEWS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/news_cache.json")
+
+MAX_ITEMS = 200
+CHUNK_SIZE = 8192
+ROWS_PER_FETCH = 20
+
+
+def load_feed_config():
+    """Load the configured feeds and refresh settings."""
+    if not os.path.exists(NEWS_FEEDS_PATH):
+        return {"feeds": []}
+    with open(NEWS_FEEDS_PATH, "r") as file:
+        return json.load(file)
+
+
+def local_name(tag):
+    """Strip the XML namespace from a tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_timestamp(text):
+    """Convert an RSS (RFC 2822) or Atom (ISO 8601) date to a Unix timestamp."""
+    if not text:
+        return 0
+    text = text.strip()
+    try:
+        moment = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            moment = datetime.fromisoformat(text)
+        except ValueError:
+            return 0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def element_item(element, source):
+    """Turn an RSS <item> or Atom <entry> element into a news item dict."""
+    title = link = published = guid = ""
+    for child in element:
+        name = local_name(child.tag)
+        if name == "title":
+            title = "".join(child.itertext()).strip()
+        elif name == "link":
+            # Atom keeps the URL in href, RSS in the element text.
+            if not link or child.get("rel", "alternate") == "alternate":
+                link = child.get("href") or (child.text or "").strip()
+        elif name in ("pubDate", "published", "updated", "date") and not published:
+            published = child.text
+        elif name in ("guid", "id"):
+            guid = (child.text or "").strip()
+    return {
+        "id": guid or link or title,
+        "title": title,
+        "link": link,
+        "source": source,
+        "published": parse_timestamp(published),
+    }
+
+
+def parse_feed(chunks, source):
+    """
+    Incrementally parse an RSS or Atom document from an iterable of byte
+    chunks, yielding items as soon as each one is complete.  Parsed elements
+    are cleared right away so memory stays flat for large feeds.
+    """
+    parser = XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if local_name(element.tag) in ("item", "entry"):
+                item = element_item(element, source)
+                element.clear()
+                if item["title"]:
+                    yield item
+    parser.close()
+
+
+def read_file_chunks(path):
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def newest_items(items, max_items):
+    """The max_items newest of the parsed items, holding no more than that many at once."""
+    return heapq.nlargest(max_items, items, key=lambda item: item["published"])
+
+
+def fetch_feed(session, feed, validators, max_items=MAX_ITEMS):
+    """
+    Fetch one feed, sending the ETag / Last-Modified from the previous fetch.
+    Returns (items, validators); items is None when the feed is unchanged.
+    Only the max_items newest items are kept, however long the feed is.
+    """
+    url = feed["url"]
+    source = feed.get("name", url)
+    if url.startswith("file://"):
+        return newest_items(parse_feed(read_file_chunks(url[len("file://"):]), source), max_items), {}
+
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    with session.get(url, headers=headers, stream=True, timeout=HTTP_TIMEOUT) as response:
+        if response.status_code == 304:
+            return None, validators
+        response.raise_for_status()
+        items = newest_items(parse_feed(response.iter_content(CHUNK_SIZE), source), max_items)
+        new_validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+    return items, new_validators
+
+
+class NewsStore:
+    """Newest-first news items, capped at max_items, with the feed validators."""
+
+    def __init__(self, max_items=MAX_ITEMS):
+        self.max_items = max_items
+        self.items = []
+        self.validators = {}
+        self.lock = threading.Lock()
+
+    def merge(self, items):
+        """Add items, replacing ones with the same id, and drop the oldest over the cap."""
+        with self.lock:
+            by_id = {item["id"]: item for item in self.items}
+            for item in items:
+                by_id[item["id"]] = item
+            merged = sorted(by_id.values(), key=lambda item: item["published"], reverse=True)
+            self.items = merged[:self.max_items]
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.items)
+
+    def load(self, path=NEWS_CACHE_PATH):
+        """Load the disk cache, so headlines are shown before any network access."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Error reading news cache: {e}")
+            return
+        with self.lock:
+            self.items = data.get("items", [])[:self.max_items]
+            self.validators = data.get("validators", {})
+
+    def save(self, path=NEWS_CACHE_PATH):
+        """Write the cache atomically, so a crash never leaves half a file."""
+        with self.lock:
+            data = {"items": self.items, "validators": self.validators, "saved": time.time()}
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(temp_path, path)
+
+
+class NewsEngine(QObject):
+    """Refreshes the configured feeds as a coroutine on the shared asyncio loop."""
+
+    updated = pyqtSignal()
+
+    def __init__(self, config=None, cache_path=NEWS_CACHE_PATH, parent=None):
+        super().__init__(parent)
+        self.config = config if config is not None else load_feed_config()
+        self.cache_path = cache_path
+        self.store = NewsStore(self.config.get("max_items", MAX_ITEMS))
+        self.store.load(cache_path)
+        self.runner = get_runner()
+        self.task = None
+
+    def refresh(self):
+        """Start a background refresh unless one is already running."""
+        if self.task and not self.task.done():
+            return
+        self.task = self.runner.submit(self.refresh_feeds())
+
+    def cancel(self):
+        if self.task:
+            self.task.cancel()
+
+    async def refresh_feeds(self):
+        changed = False
+        for feed in self.config.get("feeds", []):
+            try:
+                # The streaming parse runs off the loop, on the shared session.
+                items, validators = await asyncio.to_thread(
+                    fetch_feed, self.runner.session, feed, self.store.validators.get(feed["url"], {}),
+                    self.store.max_items,
+                )
+            except (requests.exceptions.RequestException, OSError, ParseError) as e:
+                print(f"Error fetching news feed {feed['url']}: {e}")
+                continue
+            if items is None:
+                continue
+            self.store.merge(items)
+            with self.store.lock:
+                self.store.validators[feed["url"]] = validators
+            changed = True
+            self.updated.emit()
+        if changed:
+            try:
+                await asyncio.to_thread(self.store.save, self.cache_path)
+            except OSError as e:
+                print(f"Error writing news cache: {e}")
+
+
+class NewsModel(QAbstractListModel):
+    """
+    List model over a news snapshot that exposes rows in batches as the
+    view scrolls, so only the visible part of the list is ever laid out.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.loaded = 0
+
+    def set_items(self, items):
+        """
+        Show a new snapshot.  Only the rows that left, arrived or changed
+        are updated, so the rows loaded so far and the scroll position
+        survive a refresh.
+        """
+        ids = {item["id"] for item in items}
+        for row in reversed(range(len(self.items))):
+            if self.items[row]["id"] not in ids:
+                self.remove_row(row)
+        current = {item["id"] for item in self.items}
+        for row, item in enumerate(items):
+            if row < len(self.items) and self.items[row]["id"] == item["id"]:
+                if self.items[row] != item:
+                    self.items[row] = item
+                    if row < self.loaded:
+                        self.dataChanged.emit(self.index(row), self.index(row))
+            elif item["id"] not in current:
+                self.insert_row(row, item)
+            else:
+                # An item moved, so rebuild the list with as many rows loaded
+                self.beginResetModel()
+                self.items = list(items)
+                self.loaded = min(len(items), max(self.loaded, ROWS_PER_FETCH))
+                self.endResetModel()
+                return
+        if self.loaded < ROWS_PER_FETCH and self.canFetchMore():
+            self.fetchMore()
+
+    def remove_row(self, row):
+        if row < self.loaded:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.items[row]
+            self.loaded -= 1
+            self.endRemoveRows()
+        else:
+            del self.items[row]
+
+    def insert_row(self, row, item):
+        if row < self.loaded:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.items.insert(row, item)
+            self.loaded += 1
+            self.endInsertRows()
+        else:
+            self.items.insert(row, item)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.items)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(ROWS_PER_FETCH, len(self.items) - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+        item = self.items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if item["published"]:
+                when = datetime.fromtimestamp(item["published"]).strftime("%m/%d %H:%M")
+                return f"{item['title']}\n{item['source']} · {when}"
+            return f"{item['title']}\n{item['source']}"
+        return None
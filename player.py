@@ -0,0 +1,131 @@
+import os
+import json
+import asyncio
+import tempfile
+import subprocess
+
+STOP_TIMEOUT = 2  # seconds to wait for mpv to exit before killing it
+IPC_CONNECT_TIMEOUT = 3  # seconds to wait for a new mpv to open its IPC socket
+
+
+class MpvPlayer:
+    """
+    A single mpv playback process, driven from the asyncio loop.
+
+    Starting playback stops the previous process first, and only this
+    player's own process is stopped, so the alert sound keeps playing.
+    Each player runs mpv with its own JSON IPC socket, so a running
+    process can be paused, resumed and queried.
+    """
+
+    def __init__(self, name="player"):
+        self.process = None
+        self.source = None
+        self.lock = asyncio.Lock()
+        self.ipc_path = os.path.join(
+            tempfile.gettempdir(), f"grandma_clock_{name}_{os.getpid()}.sock"
+        )
+
+    @property
+    def playing(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def play(self, args, paused=False):
+        """Replace whatever is playing with mpv started on args."""
+        async with self.lock:
+            await self._stop()
+            options = ["--no-video", f"--input-ipc-server={self.ipc_path}"]
+            if paused:
+                options.append("--pause")
+            self.process = await asyncio.create_subprocess_exec(
+                "mpv", *options, *args,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            self.source = args[-1] if args else None
+
+    async def stop(self):
+        async with self.lock:
+            await self._stop()
+
+    async def _stop(self):
+        if not self.playing:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        self.process = None
+        self.source = None
+
+    async def wait_exit(self, timeout):
+        """Return whether mpv is not running, waiting up to timeout seconds for it to exit."""
+        process = self.process
+        if process is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def connect(self):
+        """Open the IPC socket, retrying while a freshly started mpv creates it."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + IPC_CONNECT_TIMEOUT
+        while True:
+            try:
+                return await asyncio.open_unix_connection(self.ipc_path)
+            except OSError:
+                if not self.playing or loop.time() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+
+    async def command(self, *args):
+        """Send one command over the IPC socket and return its "data" field."""
+        reply = (await self.commands([args]))[0]
+        if reply["error"] != "success":
+            raise RuntimeError(f"mpv {args[0]}: {reply['error']}")
+        return reply.get("data")
+
+    async def commands(self, commands):
+        """
+        Send several commands over one IPC connection and return their
+        replies, in order.  Failed commands are returned, not raised.
+        """
+        reader, writer = await self.connect()
+        try:
+            for request_id, args in enumerate(commands):
+                request = {"command": list(args), "request_id": request_id}
+                writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            replies = {}
+            while len(replies) < len(commands):
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("mpv closed the IPC socket")
+                reply = json.loads(line)
+                # Skip asynchronous event messages until the commands' replies.
+                if "error" in reply:
+                    replies[reply.get("request_id", 0)] = reply
+            return [replies[request_id] for request_id in range(len(commands))]
+        finally:
+            writer.close()
+
+    async def properties(self, *names):
+        """Read several properties over one connection; unavailable ones are None."""
+        replies = await self.commands([("get_property", name) for name in names])
+        return [reply.get("data") if reply["error"] == "success" else None for reply in replies]
+
+    async def resume(self):
+        """Unpause a player started with paused=True."""
+        await self.command("set_property", "pause", False)
+
+    async def resume_or_play(self, args):
+        """Unpause a player started with paused=True, or start mpv on args if it cannot be unpaused."""
+        try:
+            await self.resume()
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"Cannot resume the prewarmed player, starting it again: {e}")
+            await self.play(args)
@@ -0,0 +1,106 @@
+import os
+
+from scheduler import parse_time
+
+BACKLIGHT_DIR = "/sys/class/backlight"
+PROC_TASKS_DIR = "/proc/self/task"
+
+
+def parse_night_window(text):
+    """Parse night hours such as "22:00-07:00" into (start, end) minutes of the day."""
+    start, separator, end = text.partition("-")
+    if not separator:
+        raise ValueError(f"night hours must look like 22:00-07:00, not {text!r}")
+    return parse_time(start.strip()), parse_time(end.strip())
+
+
+def in_night_window(window, moment):
+    """Whether moment falls in the night hours, which may span midnight."""
+    start, end = window
+    minute = moment.hour * 60 + moment.minute
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+def thread_wakeups():
+    """
+    For each thread of this process, the number of times it went to sleep
+    and was woken again so far (its voluntary context switches).
+    """
+    counts = {}
+    for task in os.listdir(PROC_TASKS_DIR):
+        try:
+            with open(os.path.join(PROC_TASKS_DIR, task, "status"), "r") as file:
+                for line in file:
+                    if line.startswith("voluntary_ctxt_switches:"):
+                        counts[task] = int(line.split()[1])
+                        break
+        except OSError:
+            pass  # The thread exited meanwhile
+    return counts
+
+
+class WakeupCounter:
+    """
+    Counts CPU wakeups of this process from /proc (Linux only).  Threads
+    are followed one by one, so threads that exit between two readings
+    are not subtracted from the total.
+    """
+
+    def __init__(self):
+        self.available = os.path.isdir(PROC_TASKS_DIR)
+        self.counts = thread_wakeups() if self.available else {}
+
+    def take(self):
+        """Return the wakeups since the previous call, or None if they cannot be measured."""
+        if not self.available:
+            return None
+        counts = thread_wakeups()
+        wakeups = sum(count - self.counts.get(task, 0) for task, count in counts.items())
+        self.counts = counts
+        return wakeups
+
+
+class Backlight:
+    """
+    Screen brightness through the kernel's sysfs backlight interface.
+    dim() returns False when there is no backlight or it is not writable,
+    so the caller can dim some other way.
+    """
+
+    def __init__(self, level):
+        self.level = level  # fraction of the maximum brightness while dimmed
+        self.saved = None
+        devices = sorted(os.listdir(BACKLIGHT_DIR)) if os.path.isdir(BACKLIGHT_DIR) else []
+        self.path = os.path.join(BACKLIGHT_DIR, devices[0]) if devices else None
+
+    def read(self, name):
+        with open(os.path.join(self.path, name), "r") as file:
+            return int(file.read())
+
+    def write(self, value):
+        with open(os.path.join(self.path, "brightness"), "w") as file:
+            file.write(str(value))
+
+    def dim(self):
+        if self.path is None:
+            return False
+        try:
+            brightness = self.read("brightness")
+            self.write(max(1, round(self.read("max_brightness") * self.level)))
+            self.saved = brightness
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Cannot dim the backlight, dimming the window instead: {e}")
+            self.path = None  # Do not try again
+            return False
+
+    def restore(self):
+        if self.saved is None:
+            return
+        try:
+            self.write(self.saved)
+        except OSError as e:
+            print(f"Error restoring the backlight: {e}")
+        self.saved = None
@@ -0,0 +1,461 @@
+import os
+import sys
+import json
+import itertools
+import time
+import codecs
+import asyncio
+from array import array
+
+import requests
+
+# Define paths
+RADIO_STATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/music/radio_stations.json")
+RADIO_STATIONS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/music/radio_stations_cache.json")
+RADIO_PICKS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources/music/radio_picks.json")
+
+RADIO_BROWSER_URL = "https://de1.api.radio-browser.info/json/stations/bycountry/"
+COUNTRIES_TO_FETCH = ["Israel", "United Kingdom", "United States", "Canada"]
+CACHE_MAX_AGE = 7 * 24 * 60 * 60  # 1 week in seconds
+FAILED_RETRY_AGE = 60 * 60  # retry sooner when some countries could not be fetched
+RECENT_LIMIT = 10
+
+FETCH_TIMEOUT = (5, 15)  # (connect, read) seconds
+COUNTRY_FETCH_SECONDS = 60  # total time allowed for one country's response
+WORKER_TIMEOUT = COUNTRY_FETCH_SECONDS * len(COUNTRIES_TO_FETCH) + 30
+CHUNK_SIZE = 65536
+
+
+class StringPool:
+    """
+    Append-only list of strings packed into one UTF-8 buffer.
+
+    Strings are addressed by index through an offset array, so a pool of
+    thousands of strings costs two flat buffers instead of one Python
+    object per string.
+    """
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, strings=()):
+        self.data = bytearray()
+        self.offsets = array("I", [0])
+        for string in strings:
+            self.append(string)
+
+    def append(self, string):
+        self.data += string.encode("utf-8")
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class CountryStations:
+    """Station names and URLs for one country, as parallel string pools."""
+    __slots__ = ("names", "urls")
+
+    def __init__(self, stations=()):
+        self.names = StringPool()
+        self.urls = StringPool()
+        for name, url in stations:
+            self.names.append(name)
+            self.urls.append(url)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class StationCatalog:
+    """Radio stations grouped by country, with interned country names."""
+    __slots__ = ("countries",)
+
+    def __init__(self):
+        self.countries = {}
+
+    def __bool__(self):
+        return bool(self.countries)
+
+    def __len__(self):
+        return sum(len(stations) for stations in self.countries.values())
+
+    def set_country(self, country, stations):
+        """Store (name, url) pairs for a country, replacing any previous ones."""
+        self.countries[sys.intern(country)] = CountryStations(stations)
+
+    def country_names(self):
+        return sorted(self.countries)
+
+    def station_names(self, country):
+        stations = self.countries.get(country)
+        return list(stations.names) if stations else []
+
+    def station_url(self, country, index):
+        return self.countries[country].urls[index]
+
+    def to_json(self):
+        """Columnar form used by the cache file."""
+        return {
+            country: {"names": list(stations.names), "urls": list(stations.urls)}
+            for country, stations in self.countries.items()
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        """Build a catalog from the cache file, accepting the old list-of-dicts form."""
+        catalog = cls()
+        for country, stations in data.items():
+            if isinstance(stations, dict):
+                pairs = zip(stations["names"], stations["urls"])
+            else:
+                pairs = ((station["name"], station["url"]) for station in stations)
+            catalog.set_country(country, pairs)
+        return catalog
+
+
+class StationPicks:
+    """
+    Favorite stations and the most recently played ones, as (name, url)
+    pairs.  Kept in a small file next to the station cache, so the large
+    cache is not rewritten every time a station is played.
+    """
+
+    def __init__(self, path=RADIO_PICKS_PATH):
+        self.path = path
+        self.favorites = []
+        self.recent = []
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Error reading radio favorites: {e}")
+            return self
+        self.favorites = [tuple(station) for station in data.get("favorites", [])]
+        self.recent = [tuple(station) for station in data.get("recent", [])]
+        return self
+
+    def save(self):
+        try:
+            with open(self.path, "w") as file:
+                json.dump({"favorites": self.favorites, "recent": self.recent}, file, indent=4)
+        except OSError as e:
+            print(f"Error writing radio favorites: {e}")
+
+    def is_favorite(self, station):
+        return station in self.favorites
+
+    def toggle_favorite(self, station):
+        """Add or remove a station from the favorites and return whether it is one now."""
+        if station in self.favorites:
+            self.favorites.remove(station)
+        else:
+            self.favorites.append(station)
+        self.save()
+        return station in self.favorites
+
+    def played(self, station):
+        """Move a station to the front of the recently played list."""
+        if station in self.recent:
+            self.recent.remove(station)
+        self.recent.insert(0, station)
+        del self.recent[RECENT_LIMIT:]
+        self.save()
+
+    def top_favorite(self):
+        """The favorite played most recently, or the first one if none was played."""
+        for station in self.recent:
+            if station in self.favorites:
+                return station
+        return self.favorites[0] if self.favorites else None
+
+
+def merge_stations(stations, seen, merged):
+    """
+    Add stations to merged as (name, url) pairs, skipping names already seen.
+    Only the name and URL are kept; the rest of each API record is dropped.
+    """
+    for station in stations:
+        station_name = station.get("name")
+        if station_name and station_name not in seen:
+            merged.append((station_name, station.get("url", "")))
+            seen.add(station_name)
+
+
+def build_country(station_lists):
+    """Deduplicate and sort the (name, url) pairs from several station lists."""
+    seen = set()
+    merged = []
+    for stations in station_lists:
+        merge_stations(stations, seen, merged)
+    # Sort the stations alphabetically by station name
+    merged.sort(key=lambda station: station[0].lower())
+    return merged
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a JSON array from an iterable of text chunks as
+    soon as each one is complete, so a large response is never held whole.
+    An element counts as complete once the "," or "]" after it arrived, so
+    numbers split across chunks are decoded whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    for chunk in itertools.chain(chunks, [None]):
+        last = chunk is None
+        if not last:
+            buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,[":
+                position += 1
+            if position == len(buffer) or buffer[position] == "]":
+                break
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                break  # The element continues in the next chunk
+            after = end
+            while after < len(buffer) and buffer[after] in " \t\r\n":
+                after += 1
+            if not last and (after == len(buffer) or buffer[after] not in ",]"):
+                break  # A number such as 1. or 1e may continue in the next chunk
+            position = end
+            yield value
+        buffer = buffer[position:]
+    if buffer.strip() not in ("", "]"):
+        raise ValueError("incomplete JSON array")
+
+
+def stream_radio_browser_stations(session, country):
+    """
+    Yield the station records RadioBrowser returns for a country while the
+    response is still arriving.  Raises TimeoutError if the whole response
+    takes longer than COUNTRY_FETCH_SECONDS.
+    """
+    deadline = time.monotonic() + COUNTRY_FETCH_SECONDS
+    with session.get(RADIO_BROWSER_URL + country, stream=True, timeout=FETCH_TIMEOUT) as response:
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        def text_chunks():
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"no complete response in {COUNTRY_FETCH_SECONDS} s")
+                yield decoder.decode(chunk)
+
+        yield from iter_json_array(text_chunks())
+
+
+def load_local_stations():
+    """Stations from the local radio_stations.json, by country."""
+    if not os.path.exists(RADIO_STATIONS_PATH):
+        return {}
+    with open(RADIO_STATIONS_PATH, "r") as file:
+        return json.load(file)
+
+
+def load_cache():
+    """Return the parsed cache file, or None if it is missing or unreadable."""
+    if not os.path.exists(RADIO_STATIONS_CACHE_PATH):
+        return None
+    try:
+        with open(RADIO_STATIONS_CACHE_PATH, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Error reading radio stations cache: {e}")
+        return None
+
+
+def is_cache_valid(cache_data):
+    """
+    Check if the radio stations cache is valid: not older than a week, or
+    than an hour when some countries could not be fetched for it.
+    """
+    if not cache_data:
+        return False
+    age = time.time() - cache_data.get("last_update", 0)
+    if cache_data.get("failed"):
+        return age < FAILED_RETRY_AGE
+    return age < CACHE_MAX_AGE
+
+
+def load_snapshot():
+    """
+    Return (catalog, is_valid) for the last cached snapshot, however old it
+    is, or for the local stations alone if there is no cache yet.
+    """
+    cache_data = load_cache()
+    if cache_data:
+        return StationCatalog.from_json(cache_data["stations"]), is_cache_valid(cache_data)
+    catalog = StationCatalog()
+    for country, stations in load_local_stations().items():
+        if isinstance(stations, list):
+            catalog.set_country(country, build_country([stations]))
+    return catalog, False
+
+
+def save_cache(catalog, failed=()):
+    """
+    Save the stations and the current time to the cache.  The file is
+    replaced atomically, so readers only ever see a complete snapshot.
+    """
+    temp_path = RADIO_STATIONS_CACHE_PATH + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump({
+            "stations": catalog.to_json(),
+            "last_update": time.time(),
+            "failed": list(failed),
+        }, file)
+    os.replace(temp_path, RADIO_STATIONS_CACHE_PATH)
+
+
+def refresh_catalog():
+    """
+    Fetch every country and write a complete new snapshot.  Runs in the
+    worker process started by refresh_radio_stations.
+
+    Each API response is deduplicated record by record as it streams in,
+    and sorted once complete.  A country whose fetch fails or comes back
+    empty keeps its stations from the previous snapshot.  Returns the
+    countries that could not be fetched.
+    """
+    previous = load_cache() or {}
+    previous_catalog = StationCatalog.from_json(previous.get("stations", {}))
+    local_stations = load_local_stations()
+    catalog = StationCatalog()
+    failed = []
+    with requests.Session() as session:
+        for country in COUNTRIES_TO_FETCH:
+            local = local_stations.pop(country, [])
+            seen = set()
+            merged = []
+            try:
+                merge_stations(stream_radio_browser_stations(session, country), seen, merged)
+                if not merged:
+                    raise ValueError("no stations returned")
+            except (requests.exceptions.RequestException, ValueError, TimeoutError) as e:
+                print(f"Error fetching stations for {country}, keeping the previous ones: {e}")
+                failed.append(country)
+                if country in previous_catalog.countries:
+                    catalog.countries[country] = previous_catalog.countries[country]
+                    continue
+                seen.clear()
+                merged.clear()
+            merge_stations(local, seen, merged)
+            if not merged:
+                continue  # Nothing to show, now or before
+            # Sort the stations alphabetically by station name
+            merged.sort(key=lambda station: station[0].lower())
+            catalog.set_country(country, merged)
+    for country, stations in local_stations.items():
+        if isinstance(stations, list):
+            catalog.set_country(country, build_country([stations]))
+
+    save_cache(catalog, failed)
+    return failed
+
+
+async def load_radio_stations():
+    """Load the last radio catalog snapshot; see load_snapshot."""
+    return await asyncio.to_thread(load_snapshot)
+
+
+async def radio_stations_outdated():
+    """Whether the cached snapshot is missing or due for a refresh."""
+    return not is_cache_valid(await asyncio.to_thread(load_cache))
+
+
+async def refresh_radio_stations():
+    """
+    Rebuild the catalog snapshot in a worker process, so the merge never
+    runs in the app itself.  Returns the new catalog once the worker has
+    written a complete snapshot, or None if it failed.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.abspath(__file__), "--refresh"
+    )
+    try:
+        returncode = await asyncio.wait_for(process.wait(), WORKER_TIMEOUT)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        process.kill()
+        await process.wait()
+        raise
+    if returncode != 0:
+        print(f"Radio stations refresh failed (exit code {returncode})")
+        return None
+    catalog, _ = await asyncio.to_thread(load_snapshot)
+    return catalog
+
+
+def current_rss_kb():
+    """Resident set size of this process in kilobytes (Linux only)."""
+    with open("/proc/self/statm", "r") as file:
+        resident_pages = int(file.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def build_synthetic(representation, station_count):
+    """Hold station_count synthetic stations in the given representation."""
+    per_country = station_count // len(COUNTRIES_TO_FETCH)
+
+    def synthetic(country):
+        for index in range(per_country):
+            yield f"{country} Station {index:06d}", f"http://stream.example.org/{country[:2]}/{index}.mp3"
+
+    if representation == "dicts":
+        return {
+            country: [
+                {"country": country, "name": name, "url": url}
+                for name, url in synthetic(country)
+            ]
+            for country in COUNTRIES_TO_FETCH
+        }
+    catalog = StationCatalog()
+    for country in COUNTRIES_TO_FETCH:
+        catalog.set_country(country, synthetic(country))
+    return catalog
+
+
+def memory_benchmark(station_count=40000):
+    """
+    Report the RSS cost of holding station_count synthetic stations as the
+    old per-station dicts and as a StationCatalog.  Each representation is
+    measured in a fresh interpreter so freed memory is not reused.
+    """
+    import subprocess
+    for representation in ("dicts", "catalog"):
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), "--measure", representation, str(station_count)]
+        )
+        before, after = output.split()
+        print(f"{representation:>8}: {before.decode()} KiB -> {after.decode()} KiB RSS "
+              f"(+{int(after) - int(before)} KiB for {station_count} stations)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--refresh":
+        try:
+            refresh_catalog()
+        except (OSError, ValueError) as e:
+            print(f"Error refreshing radio stations: {e}")
+            sys.exit(1)
+    elif len(sys.argv) > 3 and sys.argv[1] == "--measure":
+        before = current_rss_kb()
+        stations = build_synthetic(sys.argv[2], int(sys.argv[3]))
+        print(before, current_rss_kb())
+    else:
+        memory_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 40000)
@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import math
+import time
+import bisect
+import subprocess
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# This module must stay free of PyQt6 imports: it is shared by the clock tab
+# and the headless reminder daemon, which never loads the widget stack.
+
+MEDICATIONS_PATH = "medications.json"
+
+# Resident name used for a medications.json holding a single, unnamed list
+DEFAULT_PROFILE = ""
+
+ALERT_SOUND_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources/alert.wav"
+)
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# A check this long after the previous one means the app stalled or the
+# device was suspended; a wall-clock change this much larger or smaller than
+# the time that passed means the clock was set.
+STALL_SECONDS = 90
+JUMP_SECONDS = 5
+# When the clock is set forward, doses in at most this much of the skipped
+# time count as missed (a device without a real-time clock can boot days
+# behind until NTP sets it)
+CATCH_UP_LIMIT = timedelta(hours=1)
+# Alerted doses are remembered this long, so setting the clock back never repeats them
+FIRED_MEMORY = timedelta(weeks=1)
+
+
+def alert_sound_command():
+    """mpv command line for the alert sound, or None if the file is missing."""
+    if os.path.exists(ALERT_SOUND_PATH):
+        return ["mpv", "--no-video", ALERT_SOUND_PATH]
+    print("Alert sound file not found!")
+    return None
+
+
+# Play alert sound
+def play_alert_sound():
+    command = alert_sound_command()
+    if command:
+        subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class SystemClock:
+    """Clock source reading the local wall-clock time."""
+
+    def now(self):
+        return datetime.now()
+
+    def monotonic(self):
+        """Seconds from a clock that is never set and, where possible, counts during suspend."""
+        if hasattr(time, "CLOCK_BOOTTIME"):
+            return time.clock_gettime(time.CLOCK_BOOTTIME)
+        return time.monotonic()
+
+
+class SimulatedClock:
+    """
+    Clock source for virtual time.  Time is kept in UTC and converted to
+    the given time zone on every read, so advancing it across a DST change
+    makes local time jump exactly as the system clock would.
+    """
+
+    def __init__(self, start, tz=None):
+        self.tz = ZoneInfo(tz) if tz else None
+        if self.tz:
+            start = start.replace(tzinfo=self.tz)
+        self.utc = start.astimezone(timezone.utc)
+        self.elapsed = 0.0
+
+    def now(self):
+        return self.utc.astimezone(self.tz).replace(tzinfo=None)
+
+    def monotonic(self):
+        return self.elapsed
+
+    def advance(self, seconds):
+        self.utc += timedelta(seconds=seconds)
+        self.elapsed += seconds
+
+    def seconds_until(self, moment):
+        """
+        Seconds until the local time moment next occurs.  A time that occurs
+        twice around a DST change counts at its first occurrence.
+        """
+        if self.tz is None:
+            return (moment - self.now()).total_seconds()
+        candidates = [
+            (moment.replace(tzinfo=self.tz, fold=fold).astimezone(timezone.utc) - self.utc).total_seconds()
+            for fold in (0, 1)
+        ]
+        ahead = [seconds for seconds in candidates if seconds > 0]
+        return min(ahead) if ahead else max(candidates)
+
+    def seconds_until_offset_change(self, limit):
+        """Seconds until the next DST change, or None if there is none within limit seconds."""
+        if self.tz is None:
+            return None
+
+        def offset(seconds):
+            return (self.utc + timedelta(seconds=seconds)).astimezone(self.tz).utcoffset()
+
+        current = offset(0)
+        if offset(limit) == current:
+            return None
+        low, high = 0, math.ceil(limit)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if offset(middle) == current:
+                low = middle
+            else:
+                high = middle
+        return high
+
+    def jump(self, seconds):
+        """Set the clock forward or back without time passing, as NTP would."""
+        self.utc += timedelta(seconds=seconds)
+
+
+def load_profiles(path=MEDICATIONS_PATH):
+    """
+    Load {resident name: medication list} from the JSON file.  The top-level
+    "medications" list is the DEFAULT_PROFILE resident, and each entry of
+    "profiles" is a named resident with its own "medications" list.
+    """
+    with open(path, "r") as file:
+        data = json.load(file)
+    profiles = {}
+    if "medications" in data:
+        profiles[DEFAULT_PROFILE] = data["medications"]
+    for name, profile in data.get("profiles", {}).items():
+        profiles[name] = profile.get("medications", [])
+    return profiles
+
+
+def save_profiles(profiles, path=MEDICATIONS_PATH):
+    """Save the residents' medications in the format read by load_profiles."""
+    data = {}
+    if DEFAULT_PROFILE in profiles:
+        data["medications"] = profiles[DEFAULT_PROFILE]
+    named = {name: meds for name, meds in profiles.items() if name != DEFAULT_PROFILE}
+    if named:
+        data["profiles"] = {name: {"medications": meds} for name, meds in named.items()}
+    with open(path, "w") as file:
+        json.dump(data, file, indent=4)
+
+
+def parse_time(text):
+    """Convert an "hh:mm" string to minutes since midnight."""
+    hours, minutes = text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def week_start(moment):
+    """Return midnight of the Monday of the week containing moment."""
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight - timedelta(days=moment.weekday())
+
+
+class Schedule:
+    """
+    Weekly index of every dose of every resident.
+
+    Each dose is stored once per day it is taken as a minute offset from
+    Monday 00:00, so the next dose or every dose inside a time window is
+    found with a bisect instead of a scan over the whole list.  All
+    residents share one index; strings repeated across residents are
+    interned, so each resident costs only its own entries.
+    """
+
+    def __init__(self, profiles):
+        entries = []
+        for profile, medications in profiles.items():
+            profile = sys.intern(profile)
+            for med in medications:
+                time = sys.intern(med["time"])
+                minute = parse_time(time)
+                name = sys.intern(med["name"])
+                for day in med["days"]:
+                    if day.lower() not in DAYS:
+                        continue
+                    day_index = DAYS.index(day.lower())
+                    entries.append((day_index * MINUTES_PER_DAY + minute, name, time, profile))
+        entries.sort(key=lambda entry: entry[0])
+        self.entries = entries
+        self.offsets = [entry[0] for entry in entries]
+        self.profiles = sorted(profiles)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def doses_for_day(self, moment, profile=None):
+        """
+        Return (name, time, resident) for every dose on the day of moment,
+        sorted by time, for one resident or for everyone if profile is None.
+        """
+        start = moment.weekday() * MINUTES_PER_DAY
+        lo = bisect.bisect_left(self.offsets, start)
+        hi = bisect.bisect_left(self.offsets, start + MINUTES_PER_DAY)
+        return [
+            (name, time, resident) for _, name, time, resident in self.entries[lo:hi]
+            if profile is None or resident == profile
+        ]
+
+    def next_dose(self, moment):
+        """
+        Return (when, doses) for the first dose strictly after moment's minute,
+        where doses lists (name, resident) for everything due at that time,
+        or (None, []) if the schedule is empty.
+        """
+        if not self.entries:
+            return None, []
+        base = week_start(moment)
+        minute = (moment - base) // timedelta(minutes=1)
+        index = bisect.bisect_right(self.offsets, minute)
+        if index == len(self.offsets):
+            index = 0
+            base += timedelta(weeks=1)
+        offset = self.offsets[index]
+        end = bisect.bisect_right(self.offsets, offset, index)
+        doses = [(name, resident) for _, name, _, resident in self.entries[index:end]]
+        return base + timedelta(minutes=offset), doses
+
+    def doses_between(self, start, end):
+        """
+        Return (when, name, resident) for every dose in the half-open window (start, end],
+        compared at minute resolution, in chronological order.
+        """
+        doses = []
+        if not self.entries or end <= start:
+            return doses
+        base = week_start(start)
+        lo = (start - base) // timedelta(minutes=1)
+        hi = (end - base) // timedelta(minutes=1)
+        while lo < hi:
+            week_hi = min(hi, MINUTES_PER_WEEK - 1)
+            first = bisect.bisect_right(self.offsets, lo)
+            last = bisect.bisect_right(self.offsets, week_hi)
+            for offset, name, _, resident in self.entries[first:last]:
+                doses.append((base + timedelta(minutes=offset), name, resident))
+            # Continue in the following week, if the window reaches that far.
+            base += timedelta(weeks=1)
+            lo, hi = -1, hi - MINUTES_PER_WEEK
+        return doses
+
+
+class DoseTracker:
+    """
+    Decides which doses to alert for, each exactly once.
+
+    Every check covers all doses since the previous check, found through
+    the schedule index, so none is skipped when the app stalls, the device
+    suspends or the clock is set forward, even across midnight.  The wall
+    clock is compared with the clock's monotonic time to tell a clock set
+    from time really passing: after a set forward only the time that passed,
+    or CATCH_UP_LIMIT, is caught up on.  Alerted doses are remembered, so
+    setting the clock back never repeats an alert.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.last_wall = clock.now()
+        self.last_elapsed = clock.monotonic()
+        self.fired = set()
+        self.pruned_on = self.last_wall.date()
+        self.report = True  # print gaps and clock jumps
+
+    def due_doses(self, schedule, now):
+        """Return (when, name, resident) for every dose up to now that was not alerted yet."""
+        elapsed = self.clock.monotonic()
+        passed = elapsed - self.last_elapsed
+        moved = (now - self.last_wall).total_seconds()
+        if self.report and passed > STALL_SECONDS:
+            print(f"No check for {passed:.0f} s, catching up on missed doses")
+        if self.report and abs(moved - passed) > JUMP_SECONDS:
+            print(f"Clock was set {'forward' if moved > passed else 'back'} by {abs(moved - passed):.0f} s")
+
+        start = self.last_wall
+        if moved - passed > JUMP_SECONDS:
+            # The skipped time did not pass, so its doses were not missed
+            start = max(start, now - max(timedelta(seconds=passed), CATCH_UP_LIMIT))
+        due = [dose for dose in schedule.doses_between(start, now) if dose not in self.fired]
+        self.fired.update(due)
+        if now.date() != self.pruned_on:
+            self.pruned_on = now.date()
+            cutoff = now - FIRED_MEMORY
+            self.fired = {dose for dose in self.fired if dose[0] >= cutoff}
+        self.last_wall = now
+        self.last_elapsed = elapsed
+        return due
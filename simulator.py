@@ -0,0 +1,272 @@
+import os
+import sys
+import time
+import tempfile
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Run without a display unless one was explicitly requested.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from clock import MedicationReminderApp
+from scheduler import MEDICATIONS_PATH, Schedule, SimulatedClock, load_profiles, save_profiles
+
+
+class ReminderSimulator:
+    """
+    Drives MedicationReminderApp through virtual time.
+
+    The app's timer is stopped and update_time is called directly for every
+    simulated tick, with a SimulatedClock as its clock source.  Every change
+    of the future/past lists, every countdown text and every alert is
+    recorded in self.events as (virtual time, kind, value) tuples.
+    """
+
+    def __init__(self, start, tz=None, medication_file=MEDICATIONS_PATH,
+                 language="en", record_countdown=True):
+        self.clock = SimulatedClock(start, tz)
+        self.record_countdown = record_countdown
+        self.events = []
+        self.ticks = 0
+        self.app = MedicationReminderApp(
+            language=language, clock=self.clock, medication_file=medication_file
+        )
+        self.app.timer.stop()
+        # Record alerts instead of playing them
+        self.app.play_alert_sound = lambda: self.events.append(
+            (self.clock.now(), "alert", self.app.alert_label.text())
+        )
+        self.last_list_state = None
+        self.last_countdown = None
+
+    def run(self, seconds, step=1, fast=False):
+        """
+        Advance virtual time by seconds, ticking every step seconds.  With
+        fast, time jumps straight to the next dose or midnight whenever no
+        recorded value can change before it.
+        """
+        if not fast:
+            for _ in range(int(seconds // step)):
+                self.clock.advance(step)
+                self.tick()
+            return
+        # Skipping ahead is not a stall, so do not report it as one
+        self.app.dose_tracker.report = False
+        end = self.clock.monotonic() + seconds
+        while self.clock.monotonic() + step <= end:
+            self.clock.advance(min(self.next_step(step), end - self.clock.monotonic()))
+            self.tick()
+        self.app.dose_tracker.report = True
+
+    def next_step(self, step):
+        """Seconds until the next tick that can change a recorded value."""
+        if self.app.list_state is not self.last_list_state:
+            return step  # Record the lists as they are now
+        _, split = self.app.list_state
+        if self.record_countdown and split < len(self.app.day_doses):
+            return step  # The countdown changes every second
+        now = self.clock.now()
+        boundary = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        when, _ = self.app.schedule.next_dose(now)
+        if when is not None:
+            boundary = min(boundary, when)
+        seconds = self.clock.seconds_until(boundary)
+        # The local time jumps at a DST change, which can change the lists
+        change = self.clock.seconds_until_offset_change(seconds)
+        if change is not None:
+            seconds = change
+        return max(step, seconds)
+
+    def jump(self, seconds):
+        """Set the virtual clock forward or back without time passing, then tick."""
+        self.clock.jump(seconds)
+        self.tick()
+
+    def tick(self):
+        self.app.update_time()
+        self.ticks += 1
+        now = self.clock.now()
+        if self.app.list_state is not self.last_list_state:
+            self.last_list_state = self.app.list_state
+            _, split = self.app.list_state
+            doses = self.app.day_doses
+            self.events.append((now, "lists", (doses[split:], doses[:split])))
+        if self.record_countdown:
+            countdown = self.app.countdown_label.text()
+            if countdown != self.last_countdown:
+                self.last_countdown = countdown
+                self.events.append((now, "countdown", countdown))
+
+    def of_kind(self, kind):
+        return [event for event in self.events if event[1] == kind]
+
+
+def write_synthetic_profiles(source, residents):
+    """
+    Write a medications file with the given number of residents, each taking
+    the medications of source shifted by a few minutes, and return its path.
+    """
+    medications = [med for meds in load_profiles(source).values() for med in meds]
+    profiles = {}
+    for index in range(residents):
+        shifted = []
+        for med in medications:
+            hours, minutes = map(int, med["time"].split(":"))
+            total = (hours * 60 + minutes + index) % (24 * 60)
+            shifted.append(dict(med, time=f"{total // 60:02d}:{total % 60:02d}"))
+        profiles[f"Resident {index + 1:03d}"] = shifted
+    path = os.path.join(tempfile.gettempdir(), f"grandma_clock_residents_{residents}.json")
+    save_profiles(profiles, path)
+    return path
+
+
+def schedule_memory_kb(medication_file):
+    """Memory allocated while building the shared schedule, in KiB."""
+    tracemalloc.start()
+    schedule = Schedule(load_profiles(medication_file))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del schedule
+    return size / 1024
+
+
+def self_check():
+    """
+    Run scripted weeks through a DST change and midnight boundaries, and
+    check the alerts and list changes against the expected ones.  Returns
+    the list of failures.
+    """
+    every_day = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+    path = os.path.join(tempfile.gettempdir(), "grandma_clock_self_check.json")
+    save_profiles({
+        "Ann": [
+            {"name": "C", "time": "01:30", "days": every_day},
+            {"name": "A", "time": "08:00", "days": every_day},
+            {"name": "E", "time": "12:00", "days": ["sunday"]},
+            {"name": "B", "time": "23:59", "days": every_day},
+        ],
+        "Bob": [{"name": "D", "time": "08:00", "days": every_day}],
+    }, path)
+    failures = []
+
+    def check(label, actual, expected):
+        if actual != expected:
+            failures.append(f"{label}:\n  expected {expected}\n  got      {actual}")
+
+    def alerts(simulator):
+        return [(when.strftime("%m/%d %H:%M:%S"), text) for when, _, text in simulator.of_kind("alert")]
+
+    # A week in London with the spring-forward change on Sunday 03/29,
+    # when 01:00-02:00 does not exist
+    simulator = ReminderSimulator(datetime(2026, 3, 23), "Europe/London", path, record_countdown=False)
+    simulator.run(7 * 24 * 3600, fast=True)
+    expected = []
+    for day in range(23, 30):
+        if day == 29:
+            expected.append((f"03/{day} 02:00:00", "Missed medication: Ann: C (01:30)"))
+        else:
+            expected.append((f"03/{day} 01:30:00", "Medication time: Ann: C"))
+        expected.append((f"03/{day} 08:00:00", "Medication time: Ann: A, Bob: D"))
+        if day == 29:
+            expected.append((f"03/{day} 12:00:00", "Medication time: Ann: E"))
+        expected.append((f"03/{day} 23:59:00", "Medication time: Ann: B"))
+    check("spring week alerts", alerts(simulator), expected)
+
+    # The lists change when the day starts and whenever a dose becomes past
+    changes = [(when.strftime("%m/%d %H:%M:%S"), [name for name, _, _ in past])
+               for when, _, (_, past) in simulator.of_kind("lists")]
+    expected = []
+    for day in range(23, 31):
+        expected.append((f"03/{day} 00:00:00" if day > 23 else "03/23 00:00:01", []))
+        if day == 30:
+            break
+        expected.append((f"03/{day} {'02:00' if day == 29 else '01:30'}:00", ["C"]))
+        expected.append((f"03/{day} 08:00:00", ["C", "A", "D"]))
+        if day == 29:
+            expected.append((f"03/{day} 12:00:00", ["C", "A", "D", "E"]))
+        expected.append((f"03/{day} 23:59:00", ["C", "A", "D", "E", "B"] if day == 29 else ["C", "A", "D", "B"]))
+    check("spring week list changes", changes, expected)
+
+    # The fall-back night repeats 01:00-02:00, and C must alert only once.
+    # Fast-forwarding must record exactly what ticking every second does.
+    runs = []
+    for fast in (False, True):
+        simulator = ReminderSimulator(datetime(2026, 10, 24, 12), "Europe/London", path,
+                                      record_countdown=False)
+        simulator.run(24 * 3600, fast=fast)
+        runs.append(simulator)
+    full, fast = runs
+    check("fall-back alerts", alerts(full), [
+        ("10/24 23:59:00", "Medication time: Ann: B"),
+        ("10/25 01:30:00", "Medication time: Ann: C"),
+        ("10/25 08:00:00", "Medication time: Ann: A, Bob: D"),
+    ])
+    check("fast-forward events", fast.events, full.events)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the medication clock through virtual time")
+    parser.add_argument("--start", default=datetime.now().strftime("%Y-%m-%d %H:%M"),
+                        help="Virtual start time, 'YYYY-MM-DD HH:MM'")
+    parser.add_argument("--days", type=float, default=7, help="Number of days to simulate")
+    parser.add_argument("--step", type=float, default=1, help="Seconds per tick")
+    parser.add_argument("--tz", default=None, help="Time zone for DST, e.g. 'Europe/London'")
+    parser.add_argument("--medications", default=MEDICATIONS_PATH, help="Medications JSON file")
+    parser.add_argument("--residents", type=int, default=0,
+                        help="Simulate this many synthetic residents built from --medications")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    parser.add_argument("--fast", action="store_true",
+                        help="Jump from dose to dose instead of ticking every second "
+                             "(countdown values are not recorded)")
+    parser.add_argument("--check", action="store_true",
+                        help="Run the scripted DST/midnight weeks and check their alerts")
+    args = parser.parse_args()
+
+    if args.check:
+        app = QApplication(sys.argv)
+        started = time.perf_counter()
+        failures = self_check()
+        for failure in failures:
+            print(failure)
+        print(f"{'FAILED' if failures else 'OK'} in {time.perf_counter() - started:.1f} s")
+        del app
+        return 1 if failures else 0
+
+    medication_file = args.medications
+    if args.residents:
+        medication_file = write_synthetic_profiles(args.medications, args.residents)
+        memory = schedule_memory_kb(medication_file)
+        print(f"{args.residents} residents: schedule and profiles use {memory:.0f} KiB "
+              f"({memory / args.residents:.1f} KiB per resident)")
+
+    app = QApplication(sys.argv)
+    simulator = ReminderSimulator(
+        datetime.strptime(args.start, "%Y-%m-%d %H:%M"), args.tz, medication_file,
+        record_countdown=not args.fast,
+    )
+    started = time.perf_counter()
+    simulator.run(args.days * 24 * 3600, args.step, fast=args.fast)
+    elapsed = time.perf_counter() - started
+
+    if not args.quiet:
+        for when, kind, value in simulator.events:
+            if kind == "lists":
+                future, past = value
+                print(f"{when:%a %m/%d %H:%M:%S}  future={[name for name, _, _ in future]} "
+                      f"past={[name for name, _, _ in past]}")
+            elif kind == "alert":
+                print(f"{when:%a %m/%d %H:%M:%S}  ALERT {value}")
+    print(f"{simulator.ticks} ticks in {elapsed * 1000:.0f} ms "
+          f"({simulator.ticks / elapsed:.0f} ticks/s), "
+          f"{len(simulator.of_kind('lists'))} list changes, "
+          f"{len(simulator.of_kind('countdown'))} countdown values, "
+          f"{len(simulator.of_kind('alert'))} alerts")
+    del app
+
+
+if __name__ == "__main__":
+    sys.exit(main())
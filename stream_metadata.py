@@ -0,0 +1,176 @@
+import re
+import ssl
+import asyncio
+from urllib.parse import urlsplit
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+POLL_INTERVAL = 2  # seconds between UI updates at most
+ICY_TIMEOUT = 10  # seconds without data before the stream counts as stalled
+MAX_REDIRECTS = 3
+PLAYER_START_CHECKS = 50  # 0.1 s apart
+PLAYER_EXIT_GRACE = 1  # seconds to wait for a failing mpv to exit
+
+ICY_FIELD = re.compile(r"(\w+)='(.*?)';", re.DOTALL)
+
+
+def parse_icy_metadata(block):
+    """Parse an ICY metadata block such as b"StreamTitle='A - B';" into a dict."""
+    text = block.rstrip(b"\0").decode("utf-8", errors="replace")
+    return dict(ICY_FIELD.findall(text))
+
+
+async def open_icy_stream(url):
+    """
+    Request url with ICY metadata enabled, following redirects.
+    Returns (reader, writer, headers) positioned at the start of the body.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                parts.hostname, port, ssl=ssl.create_default_context() if secure else None
+            ),
+            ICY_TIMEOUT,
+        )
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        writer.write(
+            f"GET {path} HTTP/1.0\r\nHost: {parts.netloc}\r\n"
+            f"Icy-MetaData: 1\r\nUser-Agent: GrannyClock\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readline(), ICY_TIMEOUT)
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), ICY_TIMEOUT)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        code = status.split()[1] if len(status.split()) > 1 else b""
+        if code.startswith(b"3") and "location" in headers:
+            writer.close()
+            url = headers["location"]
+            continue
+        if code != b"200":
+            writer.close()
+            raise ConnectionError(f"stream answered {status.decode(errors='replace').strip()}")
+        return reader, writer, headers
+    raise ConnectionError("too many redirects")
+
+
+async def read_icy_metadata(url, on_update):
+    """
+    Read ICY metadata from the stream itself.  Audio bytes between metadata
+    blocks are skipped without decoding.  on_update(info) is called with
+    "title" and "bitrate" each time a new block arrives.
+    """
+    reader, writer, headers = await open_icy_stream(url)
+    try:
+        metaint = int(headers.get("icy-metaint", 0))
+        bitrate = int(headers.get("icy-br", "0").split(",")[0] or 0)
+        if not metaint:
+            on_update({"title": headers.get("icy-name", ""), "bitrate": bitrate})
+            return
+        while True:
+            await asyncio.wait_for(reader.readexactly(metaint), ICY_TIMEOUT)
+            length = (await asyncio.wait_for(reader.readexactly(1), ICY_TIMEOUT))[0] * 16
+            if length:
+                block = await asyncio.wait_for(reader.readexactly(length), ICY_TIMEOUT)
+                fields = parse_icy_metadata(block)
+                on_update({"title": fields.get("StreamTitle", ""), "bitrate": bitrate})
+    finally:
+        writer.close()
+
+
+async def read_player_metadata(player):
+    """
+    Read the now-playing title, bitrate and buffer health from the running
+    mpv, which already parses the stream's ICY metadata while playing it.
+    All properties are read over a single IPC connection.
+    """
+    metadata, media_title, bitrate, buffer, buffering = await player.properties(
+        "metadata", "media-title", "audio-bitrate", "demuxer-cache-duration", "paused-for-cache"
+    )
+    return {
+        "title": (metadata or {}).get("icy-title") or media_title or "",
+        "bitrate": int(bitrate or 0) // 1000,
+        "buffer": buffer,
+        "buffering": bool(buffering),
+    }
+
+
+class StreamMonitor(QObject):
+    """
+    Background watcher for what the radio is playing.
+
+    Polls the player over its IPC socket every POLL_INTERVAL seconds.  If
+    the player cannot be queried, falls back to reading ICY metadata from
+    the stream directly.  changed is emitted on the GUI thread, only when
+    the information actually changed.
+    """
+
+    changed = pyqtSignal(dict)
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        self.task = None
+        self.last_info = None
+
+    def start(self, player, url):
+        self.stop()
+        self.task = self.runner.submit(self.watch(player, url))
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.last_info = None
+
+    def publish(self, info):
+        if info != self.last_info:
+            self.last_info = info
+            self.changed.emit(info)
+
+    async def watch(self, player, url):
+        # Playback is started by another task, give it a moment
+        for _ in range(PLAYER_START_CHECKS):
+            if player.playing and player.source == url:
+                break
+            await asyncio.sleep(0.1)
+        try:
+            while player.playing and player.source == url:
+                self.publish(await read_player_metadata(player))
+                await asyncio.sleep(POLL_INTERVAL)
+            self.publish({"stopped": True})
+            return
+        except (OSError, ConnectionError, ValueError) as e:
+            if player.source != url or await player.wait_exit(PLAYER_EXIT_GRACE):
+                # mpv exited during the poll: the stream stopped
+                self.publish({"stopped": True})
+                return
+            print(f"Player metadata unavailable, reading the stream instead: {e}")
+        await self.watch_stream(url)
+
+    async def watch_stream(self, url):
+        latest = {}
+        reading = asyncio.ensure_future(read_icy_metadata(url, latest.update))
+        try:
+            # Throttle: publish the latest block at most every POLL_INTERVAL
+            while not reading.done():
+                await asyncio.sleep(POLL_INTERVAL)
+                if latest:
+                    self.publish(dict(latest))
+            reading.result()
+            if latest:
+                self.publish(dict(latest))
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error reading stream metadata: {e}")
+            self.publish({"stopped": True})
+        finally:
+            reading.cancel()
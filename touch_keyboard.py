@@ -0,0 +1,214 @@
+import os
+import json
+import bisect
+from PyQt6.QtCore import Qt, QRectF, pyqtSignal
+from PyQt6.QtGui import QFont, QPainter, QColor
+from PyQt6.QtWidgets import QWidget
+
+DRUG_NAMES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources/drug_names.json"
+)
+
+# Character rows for each layout, in the order the layout key cycles through.
+KEYBOARD_LAYOUTS = {
+    "abc": ["abcdefg", "hijklmn", "opqrstu", "vwxyz-'"],
+    "אבג": ["אבגדהוז", "חטיכלמנ", "סעפצקרש", "תךםןףץ-"],
+    "123": ["123", "456", "789", ".0/"],
+}
+
+# Layout shown first for each app language.
+DEFAULT_LAYOUTS = {"he": "אבג"}
+
+SPACE = " "
+BACKSPACE = "\b"
+NEXT_LAYOUT = "\t"
+
+SUGGESTION_COUNT = 3
+
+
+def load_drug_names():
+    """Load the list of common drug names used for name completion."""
+    if not os.path.exists(DRUG_NAMES_PATH):
+        return []
+    with open(DRUG_NAMES_PATH, "r") as file:
+        return json.load(file)
+
+
+class TrieNode:
+    __slots__ = ("children", "best")
+
+    def __init__(self):
+        self.children = {}
+        self.best = []  # (rank, name) pairs, best first
+
+
+class NameTrie:
+    """
+    Case-insensitive prefix tree of names.
+
+    Every node keeps its best few completions, so looking up a prefix costs
+    one step per typed character regardless of how many names are stored.
+    Names with a lower rank are suggested first.
+    """
+
+    def __init__(self, limit=SUGGESTION_COUNT):
+        self.limit = limit
+        self.root = TrieNode()
+
+    def insert(self, name, rank=0):
+        node = self.root
+        self._offer(node, rank, name)
+        for char in name.lower():
+            node = node.children.setdefault(char, TrieNode())
+            self._offer(node, rank, name)
+
+    def _offer(self, node, rank, name):
+        for index, (old_rank, old_name) in enumerate(node.best):
+            if old_name.lower() == name.lower():
+                if rank >= old_rank:
+                    return
+                del node.best[index]
+                break
+        bisect.insort(node.best, (rank, name))
+        del node.best[self.limit:]
+
+    def complete(self, prefix):
+        """Return up to limit names starting with prefix, best first."""
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [name for _, name in node.best]
+
+
+class TouchKeyboard(QWidget):
+    """
+    On-screen keyboard painted as a single widget.
+
+    The top row shows name completions and the bottom row holds the layout,
+    space and backspace keys.  Touches are hit-tested against the key
+    rectangles computed on resize, and only the pressed key is repainted.
+    """
+
+    keyPressed = pyqtSignal(str)
+    backspacePressed = pyqtSignal()
+    suggestionChosen = pyqtSignal(str)
+
+    def __init__(self, language="en", space_label="Space", parent=None):
+        super().__init__(parent)
+        self.layout_names = list(KEYBOARD_LAYOUTS)
+        self.layout_name = DEFAULT_LAYOUTS.get(language, self.layout_names[0])
+        self.space_label = space_label
+        self.suggestions = []
+        self.rows = []  # per row: (top, bottom, key left edges, keys)
+        self.pressed = None
+        self.key_font = QFont()
+        self.key_font.setPointSize(20)
+        self.suggestion_font = QFont()
+        self.suggestion_font.setPointSize(14)
+        self.setMinimumSize(320, 320)
+
+    def set_suggestions(self, suggestions):
+        self.suggestions = suggestions[:SUGGESTION_COUNT]
+        self.layout_keys()
+        self.update()
+
+    def next_layout_name(self):
+        index = self.layout_names.index(self.layout_name)
+        return self.layout_names[(index + 1) % len(self.layout_names)]
+
+    def key_rows(self):
+        """Rows of (key, label, width weight) for the current layout."""
+        rows = [[(suggestion, suggestion, 1) for suggestion in self.suggestions]]
+        for row in KEYBOARD_LAYOUTS[self.layout_name]:
+            rows.append([(char, char, 1) for char in row])
+        rows.append([
+            (NEXT_LAYOUT, self.next_layout_name(), 2),
+            (SPACE, self.space_label, 3),
+            (BACKSPACE, "⌫", 2),
+        ])
+        return rows
+
+    def layout_keys(self):
+        """Compute key rectangles for the current size, layout and suggestions."""
+        rows = self.key_rows()
+        row_height = self.height() / len(rows)
+        self.rows = []
+        for row_index, keys in enumerate(rows):
+            total = sum(weight for _, _, weight in keys) or 1
+            unit = self.width() / total
+            lefts, x = [], 0.0
+            for _, _, weight in keys:
+                lefts.append(x)
+                x += weight * unit
+            top = row_index * row_height
+            self.rows.append((top, top + row_height, lefts, keys))
+
+    def key_rect(self, row_index, key_index):
+        top, bottom, lefts, keys = self.rows[row_index]
+        right = lefts[key_index + 1] if key_index + 1 < len(lefts) else self.width()
+        return QRectF(lefts[key_index], top, right - lefts[key_index], bottom - top)
+
+    def hit_test(self, x, y):
+        """Return (row, key) indexes under the point, or None."""
+        if not self.rows or not 0 <= y < self.height():
+            return None
+        row_index = min(int(y / self.rows[0][1]), len(self.rows) - 1)
+        lefts = self.rows[row_index][2]
+        if not lefts:
+            return None
+        return row_index, bisect.bisect_right(lefts, x) - 1
+
+    def resizeEvent(self, event):
+        self.layout_keys()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        palette = self.palette()
+        for row_index, (_, _, _, keys) in enumerate(self.rows):
+            painter.setFont(self.suggestion_font if row_index == 0 else self.key_font)
+            for key_index, (_, label, _) in enumerate(keys):
+                rect = self.key_rect(row_index, key_index)
+                if not rect.intersects(QRectF(event.rect())):
+                    continue
+                rect = rect.adjusted(2, 2, -2, -2)
+                if (row_index, key_index) == self.pressed:
+                    painter.setBrush(palette.highlight())
+                elif row_index == 0:
+                    painter.setBrush(palette.alternateBase())
+                else:
+                    painter.setBrush(palette.button())
+                painter.setPen(QColor(palette.mid().color()))
+                painter.drawRoundedRect(rect, 8, 8)
+                painter.setPen(palette.buttonText().color())
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+
+    def mousePressEvent(self, event):
+        hit = self.hit_test(event.position().x(), event.position().y())
+        if hit is None:
+            return
+        self.pressed = hit
+        self.update(self.key_rect(*hit).toAlignedRect())
+
+    def mouseReleaseEvent(self, event):
+        if self.pressed is None:
+            return
+        row_index, key_index = self.pressed
+        self.pressed = None
+        self.update(self.key_rect(row_index, key_index).toAlignedRect())
+        # A finger that slid off the key before lifting does not type it
+        if self.hit_test(event.position().x(), event.position().y()) != (row_index, key_index):
+            return
+        key = self.rows[row_index][3][key_index][0]
+        if row_index == 0:
+            self.suggestionChosen.emit(key)
+        elif key == BACKSPACE:
+            self.backspacePressed.emit()
+        elif key == NEXT_LAYOUT:
+            self.layout_name = self.next_layout_name()
+            self.layout_keys()
+            self.update()
+        else:
+            self.keyPressed.emit(key)